@@ -0,0 +1,238 @@
+# fastcore.py
+# This file provides a fused simulation kernel for a whole fleet of machines. Machine state is held
+# as a structure of arrays (one NumPy array per attribute, one slot per machine), and each tick runs
+# the state update and the sensor data generation for every machine in a single vectorized pass.
+# The kernel mirrors Machine.update_state and Machine.generate_sensor_data_batch; MachineFleet holds
+# the fleet's arrays between ticks.
+
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from data_producer.machine import (Machine, MAINTENANCE_CYCLE_RANGE,
+                                   _HOURS_PER_SECOND, _MAINTENANCE_DUE_CDF, _MINUTES_PER_SECOND,
+                                   _SENSOR_LOW, _SHIFT_INDEX, _SHIFTS, _STATES,
+                                   _TRANSITION_CDF, _error_sampler, _generate_sensor_columns)
+from data_producer.models import ERROR_CODE_NAMES, NO_ERROR, MachineStateID, ProductType, SensorBatch
+
+# Product types in a fixed order; a product's position is its index into _ERROR_CDF_TABLE.
+_PRODUCTS: Tuple[ProductType, ...] = tuple(ProductType)
+_PRODUCT_INDEX = {product: i for i, product in enumerate(_PRODUCTS)}
+
+# State indexes the kernel branches on.
+_ACTIVE = int(MachineStateID.ACTIVE)
+_MAINTENANCE = int(MachineStateID.MAINTENANCE)
+_ERROR = int(MachineStateID.ERROR)
+
+def _build_error_cdf_table() -> np.ndarray:
+    """
+    Expands the per-product error samplers into a dense array covering every error code.
+    Codes with zero weight get an empty bucket, so they are never sampled.
+
+    :return: A (n_products, n_error_codes) array of cumulative probabilities over ERROR_CODE_NAMES.
+    """
+    table = np.zeros((len(_PRODUCTS), len(ERROR_CODE_NAMES)))
+    for product_idx, product in enumerate(_PRODUCTS):
+        error_indexes, cdf = _error_sampler(product.value)
+        probabilities = np.zeros(len(ERROR_CODE_NAMES))
+        probabilities[list(error_indexes)] = np.diff(cdf, prepend=0.0)
+        table[product_idx] = np.cumsum(probabilities)
+        table[product_idx, -1] = 1.0  # Guard against rounding leaving the last bucket just below 1.
+    return table
+
+_ERROR_CDF_TABLE = _build_error_cdf_table()
+
+def _sample_cdf_rows(cdf_rows: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Samples one index per row of a stack of cumulative distributions (a vectorized bisect_right).
+
+    :param cdf_rows: A (k, n_outcomes) array of cumulative distributions.
+    :param rng: The NumPy random generator to draw from.
+    :return: A (k,) array of sampled outcome indexes.
+    """
+    return (cdf_rows <= rng.random(len(cdf_rows))[:, None]).sum(axis=1)
+
+def simulate(states: np.ndarray, error_idx: np.ndarray, last_change: np.ndarray, last_update: np.ndarray,
+             uptime: np.ndarray, maint_cycle: np.ndarray, product_idx: np.ndarray, min_duration: np.ndarray,
+             base_temp: np.ndarray, base_pressure: np.ndarray, sensor_low: np.ndarray, sensor_span: np.ndarray,
+             shift_ids: np.ndarray, timestamps: np.ndarray, rng: np.random.Generator, out: SensorBatch):
+    """
+    Advances a fleet of machines over a series of ticks, producing one reading per machine per tick.
+    All per-machine arrays have one slot per machine; the state arrays are updated in place.
+
+    :param states: MachineStateID (index into STATE_ORDER) per machine. Updated in place.
+    :param error_idx: Error code index (into ERROR_CODE_NAMES) per machine, or NO_ERROR. Updated in place.
+    :param last_change: Epoch seconds of each machine's last state change. Updated in place.
+    :param last_update: Epoch seconds of each machine's last update. Updated in place.
+    :param uptime: Uptime hours since the last maintenance per machine. Updated in place.
+    :param maint_cycle: Uptime hours before maintenance is due per machine. Updated in place.
+    :param product_idx: Product type index (into ProductType order) per machine.
+    :param min_duration: A (n_machines, n_states) array of minimum state durations in minutes.
+    :param base_temp: Base temperature per machine.
+    :param base_pressure: Base pressure per machine.
+    :param sensor_low: Resolved sensor range lows per machine (energy multiplier and max vibration applied),
+                       indexed by [machine, MachineStateID, error index + 1, field].
+    :param sensor_span: Resolved sensor range spans per machine, shaped like sensor_low.
+    :param shift_ids: Shift index per tick (into ("day", "evening", "night"); 3 for unknown shifts).
+    :param timestamps: Epoch seconds per tick, in chronological order.
+    :param rng: The NumPy random generator to draw from.
+    :param out: A SensorBatch of size n_ticks * n_machines, filled tick by tick. Only the numeric
+                columns are written; the caller fills timestamp, machine_id and product_type.
+    """
+    n = len(states)
+    machine_slots = np.arange(n)
+
+    # Tick-major views into the output columns, so out_x[t] holds tick t for every machine.
+    out_temp = out.temperature.reshape(-1, n)
+    out_pressure = out.pressure.reshape(-1, n)
+    out_energy = out.energy_consumption.reshape(-1, n)
+    out_vibration = out.vibration.reshape(-1, n)
+    out_production = out.production_rate.reshape(-1, n)
+    out_humidity = out.humidity.reshape(-1, n)
+    out_quality = out.raw_material_quality.reshape(-1, n)
+    out_override = out.operator_override.reshape(-1, n)
+    out_state = out.state.reshape(-1, n)
+    out_error = out.error_code.reshape(-1, n)
+    out_uptime = out.uptime_hours.reshape(-1, n)
+
+    for t, (now, shift_idx) in enumerate(zip(timestamps.tolist(), shift_ids.tolist())):
+        # --- State update (Machine._should_change_state and Machine._calculate_next_state) ---
+        time_in_state = (now - last_change) * _MINUTES_PER_SECOND
+        change_probability = np.minimum(0.1, time_in_state / 1000)
+        should_change = ((time_in_state >= min_duration[machine_slots, states]) &
+                         (rng.random(n) < change_probability))
+
+        candidates = np.flatnonzero(should_change)
+        if candidates.size:
+            current = states[candidates]
+            due = (uptime[candidates] > maint_cycle[candidates])[:, None]
+            cdf_rows = np.where(due, _MAINTENANCE_DUE_CDF[current, shift_idx], _TRANSITION_CDF[current, shift_idx])
+            next_states = _sample_cdf_rows(cdf_rows, rng)
+
+            changed = next_states != current
+            movers, next_states = candidates[changed], next_states[changed]
+
+            # Machines leaving MAINTENANCE reset their uptime and get a new maintenance cycle.
+            leaving_maintenance = movers[states[movers] == _MAINTENANCE]
+            uptime[leaving_maintenance] = 0
+            maint_cycle[leaving_maintenance] = rng.integers(*MAINTENANCE_CYCLE_RANGE, leaving_maintenance.size,
+                                                            endpoint=True)
+
+            states[movers] = next_states
+            last_change[movers] = now
+
+            # Machines entering ERROR get an error code for their product type; any other state clears it.
+            error_idx[movers] = NO_ERROR
+            failing = movers[next_states == _ERROR]
+            error_idx[failing] = _sample_cdf_rows(_ERROR_CDF_TABLE[product_idx[failing]], rng)
+
+        # Update uptime for machines currently in ACTIVE state.
+        active = states == _ACTIVE
+        uptime[active] += (now - last_update[active]) * _HOURS_PER_SECOND
+        last_update[:] = now
+
+        # --- Sensor generation (Machine.generate_sensor_data_batch) ---
+        # Look up each machine's resolved sensor ranges for its state and error code, then draw all values at once.
+        error_slot = error_idx + 1
+        low = sensor_low[machine_slots, states, error_slot]
+        span = sensor_span[machine_slots, states, error_slot]
+        _generate_sensor_columns(low, span, base_temp, base_pressure, rng,
+                                 out_temp[t], out_pressure[t], out_energy[t], out_vibration[t],
+                                 out_production[t], out_humidity[t], out_quality[t], out_override[t])
+        out_state[t] = states
+        out_error[t] = error_idx
+        np.round(uptime, 1, out=out_uptime[t])
+
+class MachineFleet:
+    """
+    A fleet of machines stored as a structure of arrays: one NumPy array per Machine attribute,
+    with one slot per machine. Each tick advances every machine with a single call to the fused kernel.
+    """
+    def __init__(self, machines: Sequence[Machine], seed: Optional[int] = None):
+        """
+        Initializes the fleet from existing machines. The passed Machine instances are not modified;
+        their current state is copied into the fleet's arrays.
+
+        :param machines: The machines that make up the fleet.
+        :param seed: Optional seed for the fleet's random generator, for reproducible results.
+        """
+        n = len(machines)
+        self.machine_ids = [machine.machine_id for machine in machines]  # Identifier per machine.
+        self.product_types = [machine.product_type.value for machine in machines]  # Product type value per machine.
+        self.product_idx = np.array([_PRODUCT_INDEX[machine.product_type] for machine in machines], dtype=np.intp)
+
+        # Machine state and history, updated in place by every tick.
+        self.states = np.array([machine._state_id for machine in machines], dtype=np.intp)  # MachineStateID.
+        self.error_idx = np.array([NO_ERROR if machine._error_idx is None else machine._error_idx
+                                   for machine in machines], dtype=np.intp)  # Index into ERROR_CODE_NAMES, or NO_ERROR.
+        self.last_state_change = np.array([machine.last_state_change for machine in machines], dtype=np.float64)
+        self.last_update_time = np.array([machine.last_update_time for machine in machines], dtype=np.float64)
+        self.uptime_hours = np.array([machine.uptime_hours for machine in machines], dtype=np.float64)
+        self.maintenance_cycle = np.array([machine.maintenance_cycle for machine in machines], dtype=np.float64)
+
+        # Fixed machine configuration.
+        self.min_state_duration = np.array([machine.min_state_duration for machine in machines],
+                                           dtype=np.float64).reshape(n, len(_STATES))
+        self.base_temp = np.array([machine._base_temp for machine in machines], dtype=np.float64)
+        self.base_pressure = np.array([machine._base_pressure for machine in machines], dtype=np.float64)
+        # Resolved sensor ranges (energy multiplier and max vibration applied), indexed by
+        # [slot, MachineStateID, error index + 1, field].
+        self.sensor_low = np.array([machine._sensor_low for machine in machines]).reshape(-1, *_SENSOR_LOW.shape)
+        self.sensor_span = np.array([machine._sensor_span for machine in machines]).reshape(-1, *_SENSOR_LOW.shape)
+
+        self._rng = np.random.default_rng(seed)  # Random generator shared by the whole fleet.
+
+    def __len__(self) -> int:
+        return len(self.machine_ids)
+
+    def run(self, ticks: Sequence[datetime], shift_schedule: Sequence[str]) -> SensorBatch:
+        """
+        Advances the fleet over a series of ticks.
+
+        :param ticks: The UTC datetimes to simulate, in chronological order.
+        :param shift_schedule: The work shift (e.g., "day", "evening", "night") for each tick.
+        :return: A SensorBatch with one reading per machine per tick, ordered by tick, then by machine.
+        """
+        if len(shift_schedule) != len(ticks):
+            raise ValueError("shift_schedule must contain one shift per tick")
+
+        n = len(self)
+        shift_ids = np.array([_SHIFT_INDEX.get(shift, len(_SHIFTS)) for shift in shift_schedule], dtype=np.intp)
+        timestamps = np.array([tick.timestamp() for tick in ticks], dtype=np.float64)
+
+        out = SensorBatch(len(ticks) * n)
+        simulate(self.states, self.error_idx, self.last_state_change, self.last_update_time, self.uptime_hours,
+                 self.maintenance_cycle, self.product_idx, self.min_state_duration, self.base_temp,
+                 self.base_pressure, self.sensor_low, self.sensor_span, shift_ids, timestamps,
+                 self._rng, out)
+
+        # Fill the string columns, which the numeric kernel leaves to the caller.
+        # Each tick is formatted once and shared by all of its machines' readings.
+        out.timestamp[:] = [tick_iso for tick_iso in map(datetime.isoformat, ticks) for _ in range(n)]
+        out.machine_id[:] = self.machine_ids * len(ticks)
+        out.product_type[:] = self.product_types * len(ticks)
+        return out
+
+    def tick(self, now: datetime, shift: str) -> SensorBatch:
+        """
+        Advances the fleet by a single tick, the fleet-level equivalent of calling update_state
+        and generate_sensor_data on every machine.
+
+        :param now: The current UTC datetime.
+        :param shift: The current work shift (e.g., "day", "evening", "night").
+        :return: A SensorBatch with one reading per machine, in fleet order.
+        """
+        return self.run((now,), (shift,))
+
+def simulate_machines(machines: Sequence[Machine], ticks: Sequence[datetime], shift_schedule: Sequence[str],
+                      seed: Optional[int] = None) -> SensorBatch:
+    """
+    Simulates machines over the given ticks with the fused kernel, in a single process.
+    The passed Machine instances are not modified; their current state is copied into a MachineFleet.
+
+    :param machines: The machines to simulate.
+    :param ticks: The UTC datetimes to simulate, in chronological order.
+    :param shift_schedule: The work shift (e.g., "day", "evening", "night") for each tick.
+    :param seed: Optional seed for reproducible results.
+    :return: A SensorBatch with one reading per machine per tick, ordered by tick, then by machine.
+    """
+    return MachineFleet(machines, seed).run(ticks, shift_schedule)
@@ -0,0 +1,63 @@
+# fleet.py
+# This file provides offline simulation of a whole fleet of machines over a series of ticks.
+# Each machine's state evolution is independent of the others, so machines are simulated
+# in parallel worker processes, each with its own reproducible random stream.
+
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from data_producer.machine import Machine
+from data_producer.models import SensorReading
+
+def _run_machine(machine: Machine, seed_seq: np.random.SeedSequence,
+                 ticks: Sequence[datetime], shifts: Sequence[str]) -> Tuple[str, List[SensorReading]]:
+    """
+    Simulates a single machine over all ticks. Runs inside a worker process.
+
+    :param machine: The machine to simulate (a pickled copy of the caller's instance).
+    :param seed_seq: The seed sequence for this machine's random stream.
+    :param ticks: The UTC datetimes to simulate, in chronological order.
+    :param shifts: The work shift for each tick.
+    :return: A tuple (machine_id, sensor readings), with one reading per tick.
+    """
+    # Seed the random module, which drives both the state transitions and the single-reading sensor data,
+    # so a machine's results only depend on its seed and not on which worker ran it.
+    random.seed(int(seed_seq.generate_state(1)[0]))
+
+    readings = []
+    for tick, shift in zip(ticks, shifts):
+        machine.update_state(tick.timestamp(), shift)
+        readings.append(machine.generate_sensor_data(tick))
+    return machine.machine_id, readings
+
+def simulate_fleet(machines: Sequence[Machine], ticks: Sequence[datetime], shift_schedule: Sequence[str],
+                   seed: Optional[int] = None, max_workers: Optional[int] = None) -> Dict[str, List[SensorReading]]:
+    """
+    Simulates a fleet of machines over the given ticks, one machine per worker process task.
+    The passed Machine instances are not modified; each worker simulates its own copy.
+
+    :param machines: The machines to simulate.
+    :param ticks: The UTC datetimes to simulate, in chronological order.
+    :param shift_schedule: The work shift (e.g., "day", "evening", "night") for each tick.
+    :param seed: Optional global seed. Each machine gets an independent child seed, making runs reproducible.
+    :param max_workers: The number of worker processes. Defaults to the number of CPUs.
+    :return: A dictionary mapping machine IDs to their sensor readings, one per tick.
+    """
+    if len(shift_schedule) != len(ticks):
+        raise ValueError("shift_schedule must contain one shift per tick")
+
+    # Spawn one independent seed sequence per machine from the global seed.
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(machines))
+
+    # Pre-populate the results so they keep the order of the input machines, whatever order workers finish in.
+    results: Dict[str, List[SensorReading]] = {machine.machine_id: [] for machine in machines}
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [executor.submit(_run_machine, machine, seed_seq, ticks, shift_schedule)
+                   for machine, seed_seq in zip(machines, seed_seqs)]
+        for future in as_completed(futures):
+            machine_id, readings = future.result()
+            results[machine_id] = readings
+    return results
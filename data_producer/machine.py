@@ -4,9 +4,339 @@
 # and sensor data generation based on the machine's current state and configuration.
 
 import random
-from datetime import datetime, timezone
-from typing import Dict, Tuple
-from data_producer.models import MachineState, ProductType, ERROR_CODES # Assuming models.py is in a 'data_producer' package
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from data_producer.models import MachineState, MachineStateID, ProductType, ERROR_CODE_NAMES, ERROR_DESCRIPTIONS, STATE_ORDER, _STATE_STR, SensorBatch, SensorReading # Assuming models.py is in a 'data_producer' package
+
+# Time unit conversions, as reciprocals so the per-tick conversions are multiplications.
+_MINUTES_PER_SECOND = 1 / 60
+_HOURS_PER_SECOND = 1 / 3600
+
+# Default minimum state durations in minutes to prevent rapid state flapping.
+MIN_STATE_DURATION: Dict[MachineState, float] = {
+    MachineState.ACTIVE: 15,        # Minimum duration for ACTIVE state.
+    MachineState.IDLE: 5,           # Minimum duration for IDLE state.
+    MachineState.MAINTENANCE: 60,   # Minimum duration for MAINTENANCE state.
+    MachineState.ERROR: 10          # Minimum duration for ERROR state.
+}
+
+# Range (inclusive) of uptime hours before maintenance is typically needed.
+MAINTENANCE_CYCLE_RANGE: Tuple[int, int] = (200, 400)
+
+@lru_cache(maxsize=4)
+def _cached_isoformat(timestamp: datetime, tzinfo) -> str:
+    """
+    Formats a timestamp as an ISO 8601 string. The tzinfo is part of the cache key because datetimes
+    in different time zones compare equal when they denote the same instant.
+    """
+    return timestamp.isoformat()
+
+def _isoformat(timestamp: datetime) -> str:
+    """
+    Formats a timestamp as an ISO 8601 string, cached for the last few timestamps so that
+    all machines reporting the same tick only format it once.
+
+    :param timestamp: The datetime to format.
+    :return: The ISO 8601 formatted timestamp.
+    """
+    return _cached_isoformat(timestamp, timestamp.tzinfo)
+
+# Machine states in a fixed order; a state's position is its MachineStateID and its index into the tables below.
+_STATES: Tuple[MachineState, ...] = STATE_ORDER
+_STATE_IDS: Tuple[MachineStateID, ...] = tuple(MachineStateID)
+_STATE_INDEX: Dict[MachineState, MachineStateID] = dict(zip(_STATES, _STATE_IDS))
+
+# Work shifts in a fixed order. Index len(_SHIFTS) is reserved for unknown shifts (no modifiers applied).
+_SHIFTS: Tuple[str, ...] = ("day", "evening", "night")
+_SHIFT_INDEX: Dict[str, int] = {shift: i for i, shift in enumerate(_SHIFTS)}
+
+# Shift-based adjustments to likelihood of certain states.
+_SHIFT_MODIFIERS = {
+    "day": {"active": 1.2, "maintenance": 1.5},      # Day shift: more active, higher chance of scheduled maintenance.
+    "evening": {"active": 1.0, "maintenance": 0.8},  # Evening shift: baseline activity.
+    "night": {"active": 0.6, "maintenance": 0.3}     # Night shift: less active, lower chance of maintenance.
+}
+
+# Transition probabilities matrix: P(next_state | current_state)
+# Defines the likelihood of moving from the current_state to various other states.
+_TRANSITION_MATRIX = {
+    MachineState.ACTIVE: {
+        MachineState.ACTIVE: 0.85,
+        MachineState.IDLE: 0.10,
+        MachineState.ERROR: 0.03,
+        MachineState.MAINTENANCE: 0.02
+    },
+    MachineState.IDLE: {
+        MachineState.ACTIVE: 0.70,
+        MachineState.IDLE: 0.25,
+        MachineState.ERROR: 0.02,
+        MachineState.MAINTENANCE: 0.03
+    },
+    MachineState.ERROR: { # From ERROR, higher chance to go to MAINTENANCE or attempt ACTIVE
+        MachineState.ACTIVE: 0.60,
+        MachineState.IDLE: 0.20,
+        MachineState.ERROR: 0.05, # Chance to remain in error if not resolved
+        MachineState.MAINTENANCE: 0.15
+    },
+    MachineState.MAINTENANCE: { # After MAINTENANCE, usually goes to ACTIVE or IDLE
+        MachineState.ACTIVE: 0.70,
+        MachineState.IDLE: 0.25,
+        MachineState.ERROR: 0.02, # Small chance of error post-maintenance
+        MachineState.MAINTENANCE: 0.03 # Small chance to stay in maintenance (e.g. extended work)
+    }
+}
+
+# Chance to transition straight to MAINTENANCE when a machine is due for it.
+_MAINTENANCE_DUE_PROBABILITY = 0.3
+
+# The transition matrix as a read-only (n_states, n_states) array, indexed by state index.
+_TRANSITION_ARRAY = np.array([[_TRANSITION_MATRIX[current][state] for state in _STATES] for current in _STATES])
+_TRANSITION_ARRAY.setflags(write=False)
+
+# Per-shift multipliers for every next state (modifier keys are state values), as a (n_shifts + 1, n_states) array.
+# The last row, used for unknown shifts, is all ones.
+_SHIFT_MODIFIER_ARRAY = np.array([[_SHIFT_MODIFIERS.get(shift, {}).get(state.value, 1.0) for state in _STATES]
+                                  for shift in _SHIFTS + ("",)])
+_SHIFT_MODIFIER_ARRAY.setflags(write=False)
+
+def _build_transition_cdfs(maintenance_due: bool) -> np.ndarray:
+    """
+    Precomputes the cumulative transition probabilities for every (current state, shift) pair,
+    with shift modifiers applied and each row normalized. All rows are computed in one broadcast.
+
+    :param maintenance_due: If True, blend in the extra chance of going to MAINTENANCE for machines due for it.
+    :return: A (n_states, n_shifts + 1, n_states) array where cdf[current, shift, :] is a cumulative distribution.
+    """
+    probabilities = _TRANSITION_ARRAY[:, None, :] * _SHIFT_MODIFIER_ARRAY[None, :, :]
+    probabilities /= probabilities.sum(axis=-1, keepdims=True)
+
+    if maintenance_due:
+        probabilities *= 1 - _MAINTENANCE_DUE_PROBABILITY
+        probabilities[..., MachineStateID.MAINTENANCE] += _MAINTENANCE_DUE_PROBABILITY
+
+    cdf = np.cumsum(probabilities, axis=-1)
+    cdf[..., -1] = 1.0  # Guard against rounding leaving the last bucket just below 1.
+    return cdf
+
+_TRANSITION_CDF = _build_transition_cdfs(maintenance_due=False)
+_MAINTENANCE_DUE_CDF = _build_transition_cdfs(maintenance_due=True)
+
+def _to_shift_cdf_table(cdf: np.ndarray) -> Dict[Optional[str], Tuple[Tuple[float, ...], ...]]:
+    """
+    Converts a transition CDF array into a lookup table keyed by shift, holding one row per current state.
+    The rows are stored as tuples of floats so they can be sampled with bisect.
+
+    :param cdf: A transition CDF array as returned by _build_transition_cdfs.
+    :return: A dictionary mapping each shift to a tuple of cumulative distributions over _STATES,
+             indexed by the current state's MachineStateID. The shift None holds the unmodified
+             rows used for unknown shifts.
+    """
+    return {shift: tuple(tuple(row) for row in cdf[:, shift_idx].tolist())
+            for shift_idx, shift in enumerate(_SHIFTS + (None,))}
+
+# Memoized transition rows for every (state, shift) combination, regular and maintenance-due.
+_SHIFT_CDF = _to_shift_cdf_table(_TRANSITION_CDF)
+_MAINTENANCE_DUE_SHIFT_CDF = _to_shift_cdf_table(_MAINTENANCE_DUE_CDF)
+
+# Index of the last state; a sampled index never exceeds it.
+_LAST_STATE_IDX = len(_STATES) - 1
+
+
+# Order of the sensor fields in each SENSOR_PARAMS table.
+SENSOR_FIELDS: Tuple[str, ...] = ("temp_variation", "pressure_variation", "energy", "vibration", "production_rate")
+
+# Placeholder in SENSOR_PARAMS for the machine's own max_vibration.
+_MAX_VIBRATION = np.nan
+
+# Sensor value ranges per (state, error_code), as one [low, high] row per entry of SENSOR_FIELDS.
+# Energy rows are multiplied by the machine's energy multiplier and production_rate is an inclusive integer range.
+# The error_code part of the key is only set for the ERROR state.
+SENSOR_PARAMS: Dict[Tuple[MachineState, Optional[str]], np.ndarray] = {
+    (MachineState.ACTIVE, None): np.array([
+        [-5, 10],               # Temperature slightly fluctuates around optimal.
+        [-0.05, 0.1],           # Pressure slightly fluctuates.
+        [0.8, 1.2],             # Normal energy consumption.
+        [0.1, 0.4],             # Normal vibration levels.
+        [15, 25],               # Normal production rate.
+    ]),
+    (MachineState.IDLE, None): np.array([
+        [-10, -5],              # Temperature drops when idle.
+        [-0.1, -0.05],          # Pressure drops when idle.
+        [0.1, 0.3],             # Low energy consumption.
+        [0.01, 0.1],            # Minimal vibration.
+        [0, 0],                 # No production.
+    ]),
+    (MachineState.MAINTENANCE, None): np.array([
+        [-15, -10],             # Temperature significantly lower (cool down).
+        [-0.15, -0.1],          # Pressure significantly lower.
+        [0.05, 0.2],            # Very low energy, for tools or diagnostics.
+        [0.0, 0.05],            # Almost no vibration.
+        [0, 0],                 # No production.
+    ]),
+    # In the ERROR state, energy consumption is erratic and production is severely impacted or stopped.
+    (MachineState.ERROR, "E101"): np.array([  # Overtemperature
+        [15, 25],               # Significantly higher temperature.
+        [-0.05, 0.05],          # Pressure might be normal or slightly off.
+        [0.3, 1.5],
+        [0.1, 0.4],
+        [0, 10],
+    ]),
+    (MachineState.ERROR, "E102"): np.array([  # Pressure drop
+        [-5, 5],                # Temperature might be normal.
+        [-0.3, -0.15],          # Significant pressure drop.
+        [0.3, 1.5],
+        [0.1, 0.4],
+        [0, 10],
+    ]),
+    (MachineState.ERROR, "E103"): np.array([  # Energy spike
+        [5, 15],                # Temperature might rise due to energy issue.
+        [0.05, 0.15],           # Pressure might rise.
+        [0.3, 1.5],
+        [0.1, 0.4],
+        [0, 10],
+    ]),
+    (MachineState.ERROR, "E104"): np.array([  # Vibration anomaly
+        [-5, 5],                # Temperature might be normal.
+        [-0.05, 0.05],          # Pressure might be normal.
+        [0.3, 1.5],
+        [0.5, _MAX_VIBRATION],  # Vibration is high for a vibration error.
+        [0, 10],
+    ]),
+    (MachineState.ERROR, "E105"): np.array([  # Cooling failure
+        [10, 20],               # Temperature rises due to cooling failure.
+        [-0.1, 0.1],            # Pressure might fluctuate.
+        [0.3, 1.5],
+        [0.1, 0.4],
+        [0, 10],
+    ]),
+}
+
+def _build_sensor_param_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expands SENSOR_PARAMS into dense jump tables indexed by [state index, error index + 1, field],
+    so selecting a row is a single indexed load instead of a chain of error code comparisons.
+    Error slot 0 holds the row for readings without an error code.
+
+    :return: A tuple (low, high) of (n_states, n_error_codes + 1, len(SENSOR_FIELDS)) arrays.
+    """
+    low = np.empty((len(_STATES), len(ERROR_CODE_NAMES) + 1, len(SENSOR_FIELDS)))
+    high = np.empty_like(low)
+    for state_idx, state in enumerate(_STATES):
+        for error_slot, code in enumerate((None,) + ERROR_CODE_NAMES):
+            if state == MachineState.ERROR:
+                # Any other unspecified error behaves like a cooling failure (E105).
+                params = SENSOR_PARAMS.get((state, code), SENSOR_PARAMS[(state, "E105")])
+            else:
+                params = SENSOR_PARAMS[(state, None)]  # Error codes only matter in the ERROR state.
+            low[state_idx, error_slot], high[state_idx, error_slot] = params.T
+    return low, high
+
+_SENSOR_LOW, _SENSOR_HIGH = _build_sensor_param_tables()
+
+def _resolve_sensor_params(energy_multiplier: float, max_vibration: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Resolves the sensor parameter jump tables for a specific machine.
+
+    :param energy_multiplier: The machine's energy consumption multiplier.
+    :param max_vibration: The machine's maximum vibration level.
+    :return: A tuple (low, span) of arrays shaped like _SENSOR_LOW, so that low + span * U[0, 1)
+             samples every field of a row at once.
+    """
+    low, high = _SENSOR_LOW.copy(), _SENSOR_HIGH.copy()
+    high[np.isnan(high)] = max_vibration
+    low[..., 2] *= energy_multiplier
+    high[..., 2] *= energy_multiplier
+    span = high - low
+    span[..., 4] += 1  # Integer range: flooring low + span * U[0, 1) yields low..high inclusive.
+    return low, span
+
+def _generate_sensor_columns(low: np.ndarray, span: np.ndarray, base_temp, base_pressure, rng: np.random.Generator,
+                             temperature: np.ndarray, pressure: np.ndarray, energy_consumption: np.ndarray,
+                             vibration: np.ndarray, production_rate: np.ndarray, humidity: np.ndarray,
+                             raw_material_quality: np.ndarray, operator_override: np.ndarray):
+    """
+    Draws the random sensor values for a set of readings in a few vectorized calls,
+    and writes them straight into the given output arrays (e.g., the columns of a SensorBatch).
+
+    :param low: Resolved sensor range lows, one row of len(SENSOR_FIELDS) values per reading
+                (or a single row shared by all readings).
+    :param span: Resolved sensor range spans, shaped like low.
+    :param base_temp: Base temperature, per reading or shared.
+    :param base_pressure: Base pressure, per reading or shared.
+    :param rng: The NumPy random generator to draw from.
+    :param temperature: Output array for the temperatures, one value per reading.
+    :param pressure: Output array for the pressures.
+    :param energy_consumption: Output array for the energy consumptions.
+    :param vibration: Output array for the vibration levels.
+    :param production_rate: Output array (integer) for the production rates.
+    :param humidity: Output array for the humidities.
+    :param raw_material_quality: Output array for the raw material quality scores.
+    :param operator_override: Output array (boolean) for the operator override flags.
+    """
+    n = len(temperature)
+
+    # Draw every state-dependent field for all readings in one call.
+    values = low + rng.random((n, len(SENSOR_FIELDS))) * span
+    temp_variation, pressure_variation, energy, vibration_level, production = values.T
+
+    # Write the final sensor values into the output arrays, ensuring temperature and pressure are not negative.
+    np.round(np.maximum(0, base_temp + temp_variation), 2, out=temperature)
+    np.round(np.maximum(0, base_pressure + pressure_variation), 3, out=pressure)
+    np.round(energy, 3, out=energy_consumption)
+    np.round(vibration_level, 3, out=vibration)
+    production_rate[:] = production  # Truncation floors the non-negative draws.
+    np.round(rng.uniform(45, 65, n), 2, out=humidity)
+    np.round(rng.uniform(0.7, 1.0, n), 2, out=raw_material_quality)
+    np.less(rng.random(n), 0.05, out=operator_override) # 5% chance of manual operator intervention.
+
+
+# Error probabilities weighted by product type.
+# This simulates certain products being more prone to specific types of failures.
+_PRODUCT_ERROR_WEIGHTS = {
+    ProductType.POLYETHYLENE.value: {"E101": 0.4, "E102": 0.3, "E103": 0.2, "E104": 0.1, "E105": 0.0}, # Made E105 0 for example
+    ProductType.PVC.value: {"E101": 0.5, "E102": 0.2, "E103": 0.2, "E105": 0.1, "E104": 0.0},
+    ProductType.POLYPROPYLENE.value: {"E102": 0.4, "E104": 0.3, "E101": 0.2, "E103": 0.1, "E105": 0.0},
+    ProductType.POLYSTYRENE.value: {"E104": 0.4, "E102": 0.3, "E101": 0.2, "E105": 0.1, "E103": 0.0},
+    ProductType.ABS.value: {"E103": 0.4, "E104": 0.3, "E101": 0.2, "E102": 0.1, "E105": 0.0}
+}
+
+# Default weights if the product type is not specifically listed or if error codes are missing.
+_DEFAULT_ERROR_WEIGHTS = {"E101": 0.3, "E102": 0.3, "E103": 0.2, "E104": 0.1, "E105": 0.1}
+
+def _build_error_cdf(weights: Dict[str, float]) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+    """
+    Precomputes the error codes with a non-zero weight and their cumulative probabilities.
+
+    :param weights: A dictionary mapping error codes to (unnormalized) weights.
+    :return: A tuple (error indexes into ERROR_CODE_NAMES, cdf) suitable for sampling
+             with bisect_right(cdf, random.random()).
+    """
+    # Only known error codes with a positive weight can be chosen.
+    possible_errors = {i: weights.get(code, 0.0) for i, code in enumerate(ERROR_CODE_NAMES) if weights.get(code, 0.0) > 0}
+    if not possible_errors: # If all error weights are zero, fall back to the default weights.
+        possible_errors = {ERROR_CODE_NAMES.index(code): weight for code, weight in _DEFAULT_ERROR_WEIGHTS.items() if weight > 0}
+    if not possible_errors: # If even default weights are all zero (should not happen with current setup)
+        possible_errors = {0: 1.0} # Assign first available error
+
+    cdf = np.cumsum(list(possible_errors.values())) / sum(possible_errors.values())
+    cdf[-1] = 1.0  # Guard against rounding leaving the last bucket just below 1.
+    return tuple(possible_errors), tuple(cdf.tolist())
+
+@lru_cache(maxsize=None)
+def _error_sampler(product_value: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+    """
+    Returns the error sampler for a product type. Built on first use, then cached.
+
+    :param product_value: The product type's value (e.g., "PVC"). Unlisted products use the default weights.
+    :return: A tuple (error indexes, cdf) as returned by _build_error_cdf.
+    """
+    return _build_error_cdf(_PRODUCT_ERROR_WEIGHTS.get(product_value, _DEFAULT_ERROR_WEIGHTS))
+
 
 class Machine:
     """
@@ -15,7 +345,8 @@ class Machine:
     """
     def __init__(self, machine_id: str, product_type: ProductType,
                  temp_range: Tuple[float, float], pressure_range: Tuple[float, float],
-                 energy_profile: Dict[str, float], max_vibration: float = 0.7):
+                 energy_profile: Dict[str, float], max_vibration: float = 0.7,
+                 seed: Optional[int] = None):
         """
         Initializes a new Machine instance.
 
@@ -25,6 +356,7 @@ class Machine:
         :param pressure_range: A tuple (min_pressure, max_pressure) defining the operational pressure range.
         :param energy_profile: A dictionary mapping product types (as strings) to energy consumption multipliers.
         :param max_vibration: The maximum allowable vibration level before it might indicate an issue.
+        :param seed: Optional seed for the machine's random generator, for reproducible sensor data.
         """
         self.machine_id = machine_id  # Unique identifier for this machine instance.
         self.product_type = product_type  # Type of product this machine processes.
@@ -33,21 +365,35 @@ class Machine:
         # Energy multiplier specific to the product type, defaults to 1.0 if not in profile.
         self.energy_multiplier = energy_profile.get(product_type.value, 1.0)
         self.max_vibration = max_vibration  # Maximum normal vibration level.
+        # Base temperature and pressure from the middle of their defined ranges, fixed for the machine's lifetime.
+        self._base_temp = (temp_range[0] + temp_range[1]) / 2
+        self._base_pressure = (pressure_range[0] + pressure_range[1]) / 2
+        self._rng = np.random.default_rng(seed)  # Random generator used for (batched) sensor data generation.
+        # Sensor value ranges per (state, error_code), resolved for this machine's energy and vibration profile.
+        # Indexed by [state index][error index + 1]; see _build_sensor_param_tables.
+        self._sensor_low, self._sensor_span = _resolve_sensor_params(self.energy_multiplier, max_vibration)
+        # The same ranges as nested tuples of plain Python floats, one (low, span) pair per field, for single readings.
+        self._scalar_sensor_params = tuple(
+            tuple(tuple(zip(low.tolist(), span.tolist())) for low, span in zip(state_low, state_span))
+            for state_low, state_span in zip(self._sensor_low, self._sensor_span)
+        )
+        # Lock guarding this machine's state, so concurrent updaters only contend per machine.
+        self._lock = threading.Lock()
 
         # Machine state and history attributes
-        self.current_state = MachineState.IDLE  # Initial state of the machine.
-        self.last_state_change = datetime.now(timezone.utc)  # Timestamp of the last state change.
-        self.last_update_time = datetime.now(timezone.utc)  # Initialize last update time
-        self.error_code = None  # Current error code, if any.
-        self.error_description = None  # Description corresponding to the current error_code.
+        self._state_id = MachineStateID.IDLE  # Initial state of the machine; see the current_state property.
+        # Timestamps are stored as epoch seconds, so elapsed times are plain float subtractions.
+        self.last_state_change = time.time()  # Timestamp of the last state change (epoch seconds).
+        self.last_update_time = time.time()  # Initialize last update time (epoch seconds).
+        self._error_idx: Optional[int] = None  # Index of the current error code in ERROR_CODE_NAMES, if any.
 
         # Performance metrics
         self.uptime_hours = 0  # Cumulative uptime in hours since the last maintenance.
-        self.maintenance_cycle = random.randint(200, 400)  # Hours of uptime before maintenance is typically needed.
+        self.maintenance_cycle = random.randint(*MAINTENANCE_CYCLE_RANGE)  # Hours of uptime before maintenance is typically needed.
         self.total_runtime = 0 # Total runtime of the machine (could be used for overall wear and tear tracking)
 
         # State probabilities (intended for a general, realistic distribution, not directly used for transitions here)
-        # Note: The actual state transitions are governed by the transition_matrix in _calculate_next_state.
+        # Note: The actual state transitions are governed by _TRANSITION_MATRIX (see _calculate_next_state).
         self.state_probabilities = {
             MachineState.ACTIVE: 0.70,      # Target probability for being in ACTIVE state.
             MachineState.IDLE: 0.20,        # Target probability for being in IDLE state.
@@ -55,24 +401,75 @@ class Machine:
             MachineState.ERROR: 0.03        # Target probability for being in ERROR state.
         }
 
-        # Minimum state durations in minutes to prevent rapid state flapping.
-        self.min_state_duration = {
-            MachineState.ACTIVE: 15,        # Minimum duration for ACTIVE state.
-            MachineState.IDLE: 5,           # Minimum duration for IDLE state.
-            MachineState.MAINTENANCE: 60,   # Minimum duration for MAINTENANCE state.
-            MachineState.ERROR: 10          # Minimum duration for ERROR state.
-        }
+        # Minimum state durations in minutes to prevent rapid state flapping, indexed by MachineStateID.
+        self.min_state_duration = [MIN_STATE_DURATION[state] for state in _STATES]
+
+    def __getstate__(self) -> dict:
+        """
+        Drops the lock when pickling (e.g., for worker processes), as it cannot be pickled.
+        """
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
 
-    def _should_change_state(self, current_time: datetime) -> bool:
+    def __setstate__(self, state: dict):
+        """
+        Restores a pickled machine with a new lock.
+        """
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def current_state(self) -> MachineState:
+        """
+        The machine's current operational state.
+        Stored internally as a MachineStateID, which is cheaper to compare and indexes the per-state tables.
+        """
+        return _STATES[self._state_id]
+
+    @current_state.setter
+    def current_state(self, state: MachineState):
+        """
+        Sets the machine's current operational state.
+
+        :param state: The new MachineState.
+        """
+        self._state_id = _STATE_INDEX[state]
+
+    @property
+    def error_code(self) -> Optional[str]:
+        """
+        The current error code (e.g., "E101"), or None if the machine has no active error.
+        Derived from the stored error index only when read.
+        """
+        return ERROR_CODE_NAMES[self._error_idx] if self._error_idx is not None else None
+
+    @error_code.setter
+    def error_code(self, code: Optional[str]):
+        """
+        Sets or clears (with None) the current error code.
+
+        :param code: One of ERROR_CODE_NAMES, or None.
+        """
+        self._error_idx = ERROR_CODE_NAMES.index(code) if code is not None else None
+
+    @property
+    def error_description(self) -> Optional[str]:
+        """
+        The description of the current error code, or None if the machine has no active error.
+        """
+        return ERROR_DESCRIPTIONS[self._error_idx] if self._error_idx is not None else None
+
+    def _should_change_state(self, current_time: float) -> bool:
         """
         Determines if the machine should consider changing its state based on minimum duration and a time-increasing probability.
 
-        :param current_time: The current UTC datetime.
+        :param current_time: The current time as epoch seconds.
         :return: True if a state change should be considered, False otherwise.
         """
         # Calculate time elapsed in the current state, in minutes.
-        time_in_state = (current_time - self.last_state_change).total_seconds() / 60
-        min_duration = self.min_state_duration[self.current_state]
+        time_in_state = (current_time - self.last_state_change) * _MINUTES_PER_SECOND
+        min_duration = self.min_state_duration[self._state_id]
 
         # Ensure the machine stays in the current state for at least its minimum duration.
         if time_in_state < min_duration:
@@ -83,112 +480,53 @@ class Machine:
         change_probability = min(0.1, time_in_state / 1000) # Example: after 1000 mins (16.6hrs), prob reaches 0.1 if not capped.
         return random.random() < change_probability
 
-    def _calculate_next_state(self, shift: str) -> MachineState:
+    def _calculate_next_state(self, shift: str) -> MachineStateID:
         """
         Calculates the next potential state of the machine based on the current state,
         operational shift, and predefined transition probabilities.
 
         :param shift: A string indicating the current work shift (e.g., "day", "evening", "night").
-        :return: The calculated next MachineState.
+        :return: The calculated next state, as a MachineStateID.
         """
-        # Shift-based adjustments to likelihood of certain states.
-        shift_modifiers = {
-            "day": {"active": 1.2, "maintenance": 1.5},      # Day shift: more active, higher chance of scheduled maintenance.
-            "evening": {"active": 1.0, "maintenance": 0.8},  # Evening shift: baseline activity.
-            "night": {"active": 0.6, "maintenance": 0.3}     # Night shift: less active, lower chance of maintenance.
-        }
-
-        # Check if maintenance is due based on uptime.
-        if self.uptime_hours > self.maintenance_cycle:
-            if random.random() < 0.3:  # 30% chance to transition to MAINTENANCE if due.
-                return MachineState.MAINTENANCE
-
-        # Transition probabilities matrix: P(next_state | current_state)
-        # Defines the likelihood of moving from the current_state to various other states.
-        transition_matrix = {
-            MachineState.ACTIVE: {
-                MachineState.ACTIVE: 0.85,
-                MachineState.IDLE: 0.10,
-                MachineState.ERROR: 0.03,
-                MachineState.MAINTENANCE: 0.02
-            },
-            MachineState.IDLE: {
-                MachineState.ACTIVE: 0.70,
-                MachineState.IDLE: 0.25,
-                MachineState.ERROR: 0.02,
-                MachineState.MAINTENANCE: 0.03
-            },
-            MachineState.ERROR: { # From ERROR, higher chance to go to MAINTENANCE or attempt ACTIVE
-                MachineState.ACTIVE: 0.60,
-                MachineState.IDLE: 0.20,
-                MachineState.ERROR: 0.05, # Chance to remain in error if not resolved
-                MachineState.MAINTENANCE: 0.15
-            },
-            MachineState.MAINTENANCE: { # After MAINTENANCE, usually goes to ACTIVE or IDLE
-                MachineState.ACTIVE: 0.70,
-                MachineState.IDLE: 0.25,
-                MachineState.ERROR: 0.02, # Small chance of error post-maintenance
-                MachineState.MAINTENANCE: 0.03 # Small chance to stay in maintenance (e.g. extended work)
-            }
-        }
-
-        # Apply shift modifications to the transition probabilities.
-        probabilities = transition_matrix[self.current_state].copy() # Get base probabilities for the current state.
-        modifier = shift_modifiers.get(shift, {}) # Get modifiers for the current shift.
-
-        if "active" in modifier and MachineState.ACTIVE in probabilities:
-            probabilities[MachineState.ACTIVE] *= modifier["active"]
-        if "maintenance" in modifier and MachineState.MAINTENANCE in probabilities:
-            probabilities[MachineState.MAINTENANCE] *= modifier["maintenance"]
-
-        # Normalize probabilities to ensure they sum to 1 after modification.
-        total_prob = sum(probabilities.values())
-        if total_prob == 0: # Avoid division by zero if all probabilities become zero (edge case)
-             return self.current_state # Stay in current state if no valid transitions
-        probabilities = {state: prob / total_prob for state, prob in probabilities.items()}
-
-        # Make a weighted random choice for the next state based on the (modified) probabilities.
-        rand_val = random.random()
-        cumulative_prob = 0
-        for state, prob in probabilities.items():
-            cumulative_prob += prob
-            if rand_val <= cumulative_prob:
-                return state
-
-        return self.current_state # Fallback, should ideally be covered by normalization and choice.
-
-    def update_state(self, current_time: datetime, shift: str):
+        # Machines due for maintenance (based on uptime) sample from rows with the maintenance chance folded in.
+        shift_cdfs = _MAINTENANCE_DUE_SHIFT_CDF if self.uptime_hours > self.maintenance_cycle else _SHIFT_CDF
+        cdfs = shift_cdfs.get(shift)
+        if cdfs is None:  # Unknown shifts apply no modifiers.
+            cdfs = shift_cdfs[None]
+        # The last boundary is exactly 1.0 and random() < 1.0, so only the first n - 1 boundaries need searching.
+        return _STATE_IDS[bisect_right(cdfs[self._state_id], random.random(), 0, _LAST_STATE_IDX)]
+
+    def update_state(self, current_time: float, shift: str):
         """
         Updates the machine's current state if conditions for a state change are met.
         Also handles associated logic like resetting uptime after maintenance or assigning error codes.
 
-        :param current_time: The current UTC datetime.
+        :param current_time: The current time as epoch seconds (e.g., datetime.timestamp()).
         :param shift: A string indicating the current work shift.
         """
         if self._should_change_state(current_time):
             new_state = self._calculate_next_state(shift)
 
-            if new_state != self.current_state:
+            if new_state != self._state_id:
                 # If the machine was in MAINTENANCE and is now changing state,
                 # reset uptime and set a new maintenance cycle.
-                if self.current_state == MachineState.MAINTENANCE:
+                if self._state_id == MachineStateID.MAINTENANCE:
                     self.uptime_hours = 0
-                    self.maintenance_cycle = random.randint(200, 400) # Reset maintenance interval
+                    self.maintenance_cycle = random.randint(*MAINTENANCE_CYCLE_RANGE) # Reset maintenance interval
 
-                self.current_state = new_state
+                self._state_id = new_state
                 self.last_state_change = current_time
 
                 # If the new state is ERROR, assign a specific error code.
-                if new_state == MachineState.ERROR:
+                if new_state == MachineStateID.ERROR:
                     self._assign_error_code()
                 else:
                     # Clear error codes if not in ERROR state.
-                    self.error_code = None
-                    self.error_description = None
+                    self._error_idx = None
 
         # Update uptime if the machine is currently in ACTIVE state.
-        time_elapsed_hours = (current_time - self.last_update_time).total_seconds() / 3600
-        if self.current_state == MachineState.ACTIVE:
+        time_elapsed_hours = (current_time - self.last_update_time) * _HOURS_PER_SECOND
+        if self._state_id == MachineStateID.ACTIVE:
             self.uptime_hours += time_elapsed_hours
             self.total_runtime += time_elapsed_hours
         self.last_update_time = current_time
@@ -198,127 +536,99 @@ class Machine:
         Assigns a realistic error code to the machine when it enters an ERROR state.
         The likelihood of specific errors can depend on the product type being processed.
         """
-        # Error probabilities weighted by product type.
-        # This simulates certain products being more prone to specific types of failures.
-        product_error_weights = {
-            ProductType.POLYETHYLENE.value: {"E101": 0.4, "E102": 0.3, "E103": 0.2, "E104": 0.1, "E105": 0.0}, # Made E105 0 for example
-            ProductType.PVC.value: {"E101": 0.5, "E102": 0.2, "E103": 0.2, "E105": 0.1, "E104": 0.0},
-            ProductType.POLYPROPYLENE.value: {"E102": 0.4, "E104": 0.3, "E101": 0.2, "E103": 0.1, "E105": 0.0},
-            ProductType.POLYSTYRENE.value: {"E104": 0.4, "E102": 0.3, "E101": 0.2, "E105": 0.1, "E103": 0.0},
-            ProductType.ABS.value: {"E103": 0.4, "E104": 0.3, "E101": 0.2, "E102": 0.1, "E105": 0.0}
-        }
+        # Choose an error code from the precomputed cumulative weights for this product type.
+        error_indexes, cdf = _error_sampler(self.product_type.value)
+        self._error_idx = error_indexes[bisect_right(cdf, random.random())]
+
 
-        # Default weights if the product type is not specifically listed or if error codes are missing.
-        default_weights = {"E101": 0.3, "E102": 0.3, "E103": 0.2, "E104": 0.1, "E105": 0.1}
-        specific_weights = product_error_weights.get(self.product_type.value, default_weights)
-        
-        # Ensure all global ERROR_CODES keys are present in weights, assign 0 if missing
-        weights_for_choice = {code: specific_weights.get(code, 0.0) for code in ERROR_CODES.keys()}
-
-        # Filter out errors with zero probability to avoid issues with random.choices if all are zero
-        possible_errors = {code: weight for code, weight in weights_for_choice.items() if weight > 0}
-        if not possible_errors: # If all error weights are zero for this product
-            # Fallback to default_weights or a generic error
-            possible_errors = {code: weight for code, weight in default_weights.items() if weight > 0}
-            if not possible_errors: # If even default weights are all zero (should not happen with current setup)
-                 self.error_code = list(ERROR_CODES.keys())[0] # Assign first available error
-                 self.error_description = ERROR_CODES[self.error_code]
-                 return
-
-        # Choose an error code based on the defined weights.
-        self.error_code = random.choices(list(possible_errors.keys()),
-                                         weights=list(possible_errors.values()))[0]
-        self.error_description = ERROR_CODES[self.error_code]
-
-
-    def generate_sensor_data(self, timestamp: datetime) -> dict:
+    def generate_sensor_data(self, timestamp: datetime, timestamp_iso: Optional[str] = None) -> SensorReading:
         """
         Generates a dictionary of simulated sensor data based on the machine's current state.
+        Single readings are drawn with plain Python floats, which is faster than a one-element
+        NumPy batch; use generate_sensor_data_batch for many timestamps at once.
 
         :param timestamp: The UTC datetime for which to generate the sensor data.
+        :param timestamp_iso: Optional precomputed ISO 8601 string of timestamp, e.g. formatted once per tick
+                              for all machines. Formatted here if not given.
         :return: A dictionary containing various sensor readings and machine status information.
         """
-        # Calculate base temperature and pressure from the middle of their defined ranges.
-        base_temp = (self.temp_range[0] + self.temp_range[1]) / 2
-        base_pressure = (self.pressure_range[0] + self.pressure_range[1]) / 2
-
-        # Initialize sensor value variations based on the current machine state.
-        temp_variation = 0.0
-        pressure_variation = 0.0
-        energy = 0.0
-        vibration = 0.0
-        production_rate = 0
-
-        # State-based modifications to sensor values
-        if self.current_state == MachineState.ACTIVE:
-            temp_variation = random.uniform(-5, 10)      # Temperature slightly fluctuates around optimal.
-            pressure_variation = random.uniform(-0.05, 0.1) # Pressure slightly fluctuates.
-            energy = random.uniform(0.8, 1.2) * self.energy_multiplier # Normal energy consumption.
-            vibration = random.uniform(0.1, 0.4)     # Normal vibration levels.
-            production_rate = random.randint(15, 25) # Normal production rate.
-
-        elif self.current_state == MachineState.IDLE:
-            temp_variation = random.uniform(-10, -5)     # Temperature drops when idle.
-            pressure_variation = random.uniform(-0.1, -0.05) # Pressure drops when idle.
-            energy = random.uniform(0.1, 0.3) * self.energy_multiplier # Low energy consumption.
-            vibration = random.uniform(0.01, 0.1)    # Minimal vibration.
-            production_rate = 0                      # No production.
-
-        elif self.current_state == MachineState.MAINTENANCE:
-            temp_variation = random.uniform(-15, -10)    # Temperature significantly lower (cool down).
-            pressure_variation = random.uniform(-0.15, -0.1) # Pressure significantly lower.
-            energy = random.uniform(0.05, 0.2) * self.energy_multiplier # Very low energy, for tools or diagnostics.
-            vibration = random.uniform(0.0, 0.05)   # Almost no vibration.
-            production_rate = 0                     # No production.
-
-        else:  # ERROR state
-            # Generate abnormal sensor values based on the specific error code.
-            if self.error_code == "E101":  # Overtemperature
-                temp_variation = random.uniform(15, 25) # Significantly higher temperature.
-                pressure_variation = random.uniform(-0.05, 0.05) # Pressure might be normal or slightly off.
-            elif self.error_code == "E102":  # Pressure drop
-                temp_variation = random.uniform(-5, 5) # Temperature might be normal.
-                pressure_variation = random.uniform(-0.3, -0.15) # Significant pressure drop.
-            elif self.error_code == "E103":  # Energy spike
-                temp_variation = random.uniform(5, 15) # Temperature might rise due to energy issue.
-                pressure_variation = random.uniform(0.05, 0.15) # Pressure might rise.
-            elif self.error_code == "E104":  # Vibration anomaly
-                temp_variation = random.uniform(-5, 5) # Temperature might be normal.
-                pressure_variation = random.uniform(-0.05, 0.05) # Pressure might be normal.
-            else:  # E105 - Cooling failure (or any other unspecified error)
-                temp_variation = random.uniform(10, 20) # Temperature rises due to cooling failure.
-                pressure_variation = random.uniform(-0.1, 0.1) # Pressure might fluctuate.
-
-            # General error state values
-            energy = random.uniform(0.3, 1.5) * self.energy_multiplier # Energy consumption can be erratic.
-            # Vibration is high if it's a vibration error, otherwise moderately high.
-            vibration = random.uniform(0.5, self.max_vibration) if self.error_code == "E104" else random.uniform(0.1, 0.4)
-            production_rate = random.randint(0, 10) # Production severely impacted or stopped.
-
-        # Calculate final sensor values, ensuring they are not negative.
-        temperature = max(0, base_temp + temp_variation)
-        pressure = max(0, base_pressure + pressure_variation)
+        if timestamp_iso is None:
+            timestamp_iso = _isoformat(timestamp)
+        # Bind the random function to a local to avoid repeated global and attribute lookups.
+        rand = random.random
+
+        # Look up the sensor ranges for the current state and error code in the jump table.
+        state_id = self._state_id
+        in_error = state_id == MachineStateID.ERROR
+        error_code = self.error_code if in_error else None
+        error_slot = self._error_idx + 1 if self._error_idx is not None else 0
+        params = self._scalar_sensor_params[state_id][error_slot]
+        (temp_low, temp_span), (pressure_low, pressure_span), (energy_low, energy_span), \
+            (vibration_low, vibration_span), (production_low, production_span) = params
+
+        # Calculate final sensor values as low + span * U[0, 1), ensuring temperature and pressure are not negative.
+        temperature = max(0, self._base_temp + temp_low + temp_span * rand())
+        pressure = max(0, self._base_pressure + pressure_low + pressure_span * rand())
+        energy = energy_low + energy_span * rand()
+        vibration = vibration_low + vibration_span * rand()
+        production_rate = int(production_low + production_span * rand())  # Truncation floors the non-negative draw.
 
         # Construct the complete sensor data payload with all required fields.
         # This structure is important for consumers of this data (e.g., APIs, databases).
-        data = {
-            "timestamp": timestamp.isoformat(),              # ISO 8601 formatted timestamp.
+        data: SensorReading = {
+            "timestamp": timestamp_iso,                      # ISO 8601 formatted timestamp.
             "machine_id": self.machine_id,                   # Identifier of the machine.
-            "state": self.current_state.value,               # Current operational state.
+            "state": _STATE_STR[state_id],                   # Current operational state.
             "temperature": round(temperature, 2),            # Current temperature in Celsius.
             "pressure": round(pressure, 3),                  # Current pressure in Bar or PSI.
             "energy_consumption": round(energy, 3),          # Current energy consumption in kWh or similar unit.
             "vibration": round(vibration, 3),                # Current vibration level (e.g., in g or mm/s).
-            "humidity": round(random.uniform(45, 65), 2),    # Ambient humidity near the machine (%).
+            "humidity": round(45 + 20 * rand(), 2),          # Ambient humidity near the machine (%).
             "production_rate": production_rate,              # Units produced per minute or hour.
-            "raw_material_quality": round(random.uniform(0.7, 1.0), 2), # Quality score of current raw material.
-            "operator_override": random.random() < 0.05,     # Boolean, 5% chance of manual operator intervention.
-            "cooling_status": "FAIL" if self.error_code == "E105" else "OK", # Status of the cooling system.
+            "raw_material_quality": round(0.7 + 0.3 * rand(), 2), # Quality score of current raw material.
+            "operator_override": rand() < 0.05,              # Boolean, 5% chance of manual operator intervention.
+            "cooling_status": "FAIL" if error_code == "E105" else "OK", # Status of the cooling system.
             "product_type": self.product_type.value,         # Type of product being processed.
             "uptime_hours": round(self.uptime_hours, 1),     # Machine uptime since last maintenance.
             # Always include error fields for a consistent API response structure, even if null.
-            "error_code": self.error_code if self.current_state == MachineState.ERROR else None,
-            "error_description": self.error_description if self.current_state == MachineState.ERROR else None
+            "error_code": error_code,
+            "error_description": self.error_description if in_error else None
         }
 
-        return data
\ No newline at end of file
+        return data
+
+    def generate_sensor_data_batch(self, timestamps: Sequence[datetime]) -> SensorBatch:
+        """
+        Generates simulated sensor data for several timestamps at once, holding the machine's
+        current state fixed. All random values for a field are drawn in a single vectorized
+        call, instead of one Python-level random call per field per reading.
+
+        :param timestamps: The UTC datetimes for which to generate the sensor data.
+        :return: A SensorBatch with one reading per timestamp, in the same order.
+                 Use its to_records() method to get sensor data dictionaries.
+        """
+        n = len(timestamps)
+        batch = SensorBatch(n)
+
+        # Look up the sensor ranges for the current state and error code in the jump table.
+        state_idx = self._state_id
+        in_error = state_idx == MachineStateID.ERROR
+        error_slot = self._error_idx + 1 if self._error_idx is not None else 0
+        low, span = self._sensor_low[state_idx, error_slot], self._sensor_span[state_idx, error_slot]
+
+        # Draw the sensor values for all timestamps at once.
+        _generate_sensor_columns(low, span, self._base_temp, self._base_pressure, self._rng,
+                                 batch.temperature, batch.pressure, batch.energy_consumption, batch.vibration,
+                                 batch.production_rate, batch.humidity, batch.raw_material_quality,
+                                 batch.operator_override)
+
+        # Fields that do not vary across the batch.
+        batch.timestamp[:] = [_isoformat(timestamp) for timestamp in timestamps]
+        batch.machine_id[:] = [self.machine_id] * n
+        batch.product_type[:] = [self.product_type.value] * n
+        batch.state[:] = state_idx
+        batch.uptime_hours[:] = round(self.uptime_hours, 1)
+        if in_error and self._error_idx is not None:
+            batch.error_code[:] = self._error_idx
+
+        return batch
\ No newline at end of file
@@ -1,8 +1,11 @@
 # models.py
 # This file defines data models and enumerations used throughout the data producer application.
-# It includes definitions for machine states, product types, and a mapping of error codes to descriptions.
+# It includes definitions for machine states, product types, a mapping of error codes to descriptions,
+# and the SensorReading / SensorBatch structures for sensor readings.
 
-from enum import Enum
+from enum import Enum, IntEnum
+from typing import List, Optional, Tuple, TypedDict
+import numpy as np
 
 class MachineState(str, Enum):
     """
@@ -14,6 +17,23 @@ class MachineState(str, Enum):
     MAINTENANCE = "maintenance"  # Represents the machine being under scheduled or unscheduled maintenance.
     ERROR = "error"              # Represents the machine being in an error state, unable to function correctly.
 
+class MachineStateID(IntEnum):
+    """
+    Integer identifiers of the machine states, in STATE_ORDER order.
+    Used internally for cheap comparisons and hashing, and directly as indexes into per-state tables.
+    """
+    IDLE = 0
+    ACTIVE = 1
+    MAINTENANCE = 2
+    ERROR = 3
+
+    @property
+    def value_str(self) -> str:
+        """
+        The state's string value (e.g., "active"), as used in JSON output.
+        """
+        return _STATE_STR[self]
+
 class ProductType(str, Enum):
     """
     Enumeration representing the different types of products a machine can produce.
@@ -25,12 +45,123 @@ class ProductType(str, Enum):
     POLYSTYRENE = "Polystyrene"      # Polystyrene plastic type.
     ABS = "ABS"                      # Acrylonitrile Butadiene Styrene plastic type.
 
+# Error codes and their human-readable descriptions, as parallel tuples.
+# An error code's position is its integer index, so code and description lookups are plain tuple indexing.
+ERROR_CODE_NAMES: Tuple[str, ...] = (
+    "E101",  # Error code for excessive temperature.
+    "E102",  # Error code for a significant drop in pressure.
+    "E103",  # Error code for an unexpected surge in energy consumption.
+    "E104",  # Error code for abnormal vibration levels.
+    "E105"  # Error code for a failure in the cooling system.
+)
+ERROR_DESCRIPTIONS: Tuple[str, ...] = (
+    "Overtemperature detected",
+    "Pressure drop detected",
+    "Energy spike detected",
+    "Vibration anomaly detected",
+    "Cooling failure"
+)
+
 # Dictionary mapping error codes to human-readable descriptions.
 # This provides a centralized way to manage and retrieve error messages.
-ERROR_CODES = {
-    "E101": "Overtemperature detected",      # Error code for excessive temperature.
-    "E102": "Pressure drop detected",        # Error code for a significant drop in pressure.
-    "E103": "Energy spike detected",         # Error code for an unexpected surge in energy consumption.
-    "E104": "Vibration anomaly detected",    # Error code for abnormal vibration levels.
-    "E105": "Cooling failure"                # Error code for a failure in the cooling system.
-}
\ No newline at end of file
+ERROR_CODES = dict(zip(ERROR_CODE_NAMES, ERROR_DESCRIPTIONS))
+
+class SensorReading(TypedDict):
+    """
+    The fixed-key payload of a single sensor reading, as produced by Machine.generate_sensor_data.
+    It is a plain dictionary at runtime, so it can be serialized directly by json, orjson or FastAPI.
+    """
+    timestamp: str                      # ISO 8601 formatted timestamp.
+    machine_id: str                     # Identifier of the machine.
+    state: str                          # Current operational state (a MachineState value).
+    temperature: float                  # Current temperature in Celsius.
+    pressure: float                     # Current pressure in Bar or PSI.
+    energy_consumption: float           # Current energy consumption in kWh or similar unit.
+    vibration: float                    # Current vibration level (e.g., in g or mm/s).
+    humidity: float                     # Ambient humidity near the machine (%).
+    production_rate: int                # Units produced per minute or hour.
+    raw_material_quality: float         # Quality score of current raw material.
+    operator_override: bool             # Whether an operator manually intervened.
+    cooling_status: str                 # Status of the cooling system ("OK" or "FAIL").
+    product_type: str                   # Type of product being processed (a ProductType value).
+    uptime_hours: float                 # Machine uptime since last maintenance.
+    error_code: Optional[str]           # Current error code, or None if not in ERROR state.
+    error_description: Optional[str]    # Description of the current error code, or None.
+
+# Fixed ordering used to store machine states as small integers (e.g., in SensorBatch).
+STATE_ORDER: Tuple[MachineState, ...] = tuple(MachineState)
+_STATE_STR: Tuple[str, ...] = tuple(state.value for state in STATE_ORDER)  # String value per MachineStateID.
+NO_ERROR = -1  # Error code index for readings without an active error.
+_COOLING_FAILURE = ERROR_CODE_NAMES.index("E105")  # Error code index that reports a failed cooling system.
+
+class SensorBatch:
+    """
+    A batch of sensor readings stored as a structure of arrays: one contiguous NumPy array per
+    numeric field instead of one dictionary per reading. States and error codes are stored as
+    indexes into STATE_ORDER and ERROR_CODE_NAMES.
+    """
+    __slots__ = ("timestamp", "machine_id", "product_type", "state", "temperature", "pressure",
+                 "energy_consumption", "vibration", "humidity", "production_rate",
+                 "raw_material_quality", "operator_override", "uptime_hours", "error_code")
+
+    def __init__(self, size: int):
+        """
+        Preallocates the arrays for a batch of readings.
+
+        :param size: The number of readings in the batch.
+        """
+        self.timestamp: List[str] = [""] * size            # ISO 8601 formatted timestamps.
+        self.machine_id: List[str] = [""] * size           # Identifiers of the machines.
+        self.product_type: List[str] = [""] * size         # Types of product being processed.
+        self.state = np.zeros(size, dtype=np.uint8)        # MachineStateID (index into STATE_ORDER).
+        self.temperature = np.zeros(size)                  # Temperature in Celsius.
+        self.pressure = np.zeros(size)                     # Pressure in Bar or PSI.
+        self.energy_consumption = np.zeros(size)           # Energy consumption in kWh or similar unit.
+        self.vibration = np.zeros(size)                    # Vibration level (e.g., in g or mm/s).
+        self.humidity = np.zeros(size)                     # Ambient humidity near the machine (%).
+        self.production_rate = np.zeros(size, dtype=np.int64) # Units produced per minute or hour.
+        self.raw_material_quality = np.zeros(size)         # Quality score of current raw material.
+        self.operator_override = np.zeros(size, dtype=bool) # Manual operator intervention flags.
+        self.uptime_hours = np.zeros(size)                 # Machine uptime since last maintenance.
+        self.error_code = np.full(size, NO_ERROR, dtype=np.int8) # Index into ERROR_CODE_NAMES, or NO_ERROR.
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def to_records(self) -> List[SensorReading]:
+        """
+        Converts the batch to sensor data dictionaries, the structure used by the API and WebSocket stream.
+
+        :return: A list of sensor data dictionaries, one per reading.
+        """
+        # tolist() converts whole columns back to plain Python values in one call each.
+        states = [_STATE_STR[i] for i in self.state.tolist()]
+        error_indexes = self.error_code.tolist()
+        columns = zip(self.timestamp, self.machine_id, states, self.temperature.tolist(),
+                      self.pressure.tolist(), self.energy_consumption.tolist(), self.vibration.tolist(),
+                      self.humidity.tolist(), self.production_rate.tolist(),
+                      self.raw_material_quality.tolist(), self.operator_override.tolist(),
+                      self.product_type, self.uptime_hours.tolist(), error_indexes)
+        return [
+            {
+                "timestamp": timestamp,
+                "machine_id": machine_id,
+                "state": state,
+                "temperature": temperature,
+                "pressure": pressure,
+                "energy_consumption": energy,
+                "vibration": vibration,
+                "humidity": humidity,
+                "production_rate": production_rate,
+                "raw_material_quality": quality,
+                "operator_override": override,
+                "cooling_status": "FAIL" if error_idx == _COOLING_FAILURE else "OK",
+                "product_type": product_type,
+                "uptime_hours": uptime_hours,
+                # Always include error fields for a consistent API response structure, even if null.
+                "error_code": ERROR_CODE_NAMES[error_idx] if error_idx != NO_ERROR else None,
+                "error_description": ERROR_DESCRIPTIONS[error_idx] if error_idx != NO_ERROR else None
+            }
+            for (timestamp, machine_id, state, temperature, pressure, energy, vibration, humidity,
+                 production_rate, quality, override, product_type, uptime_hours, error_idx) in columns
+        ]
@@ -1,22 +1,69 @@
 # sensor_simulator.py
 # This file defines the SensorSimulator class, which is responsible for managing
 # a collection of Machine instances and simulating their sensor data generation
-# in a continuous, threaded manner. It aims to mimic a real-world industrial
+# in a continuous manner, as an asyncio task. It aims to mimic a real-world industrial
 # environment with multiple machines operating in different states.
 
+import asyncio
 import threading
 import time
 import random
-from datetime import datetime, timezone, timedelta # Added timedelta for potential use
-from data_producer.machine import Machine # Assuming machine.py is in a 'data_producer' package
-from data_producer.models import ProductType, MachineState # Assuming models.py is in the same package
-from typing import Dict, List, Tuple # Added List for type hinting if needed later
+from datetime import datetime, timezone
+from types import MappingProxyType
+import numpy as np
+import orjson
+from data_producer.machine import Machine, _SENSOR_LOW, _generate_sensor_columns # Assuming machine.py is in a 'data_producer' package
+from data_producer.models import ProductType, MachineState, MachineStateID, NO_ERROR, SensorBatch # Assuming models.py is in the same package
+from typing import Dict, List, Mapping, Optional, Set, Tuple # Added List for type hinting if needed later
+
+# All available product types; machines are assigned product types by cycling through them.
+_PRODUCT_TYPES: Tuple[ProductType, ...] = tuple(ProductType)
+
+# Energy profile multipliers by product type.
+# This dictionary defines how energy consumption varies based on the product being manufactured.
+# Keyed by product type value, as expected by Machine.
+_ENERGY_PROFILE: Dict[str, float] = {
+    ProductType.POLYETHYLENE.value: 1.1,
+    ProductType.POLYPROPYLENE.value: 1.0,
+    ProductType.PVC.value: 1.3,
+    ProductType.POLYSTYRENE.value: 1.05,
+    ProductType.ABS.value: 0.95,
+}
+
+# Product-specific operational ranges for temperature.
+_TEMP_RANGES: Dict[ProductType, Tuple[float, float]] = {
+    ProductType.POLYETHYLENE: (85, 125),
+    ProductType.POLYPROPYLENE: (80, 120),
+    ProductType.PVC: (90, 135),
+    ProductType.POLYSTYRENE: (75, 115),
+    ProductType.ABS: (82, 122)
+}
+
+# Product-specific operational ranges for pressure.
+_PRESSURE_RANGES: Dict[ProductType, Tuple[float, float]] = {
+    ProductType.POLYETHYLENE: (0.4, 0.9),
+    ProductType.POLYPROPYLENE: (0.35, 0.85),
+    ProductType.PVC: (0.45, 0.95),
+    ProductType.POLYSTYRENE: (0.3, 0.8),
+    ProductType.ABS: (0.38, 0.88)
+}
+
+# Distribution of the machines' initial states, weighted towards ACTIVE and IDLE states:
+# 70% Active, 20% Idle, 10% Maintenance. Cumulative weights, so random.choices does not recompute them per machine.
+_INITIAL_STATE_POP: Tuple[MachineState, ...] = (MachineState.ACTIVE, MachineState.IDLE, MachineState.MAINTENANCE)
+_INITIAL_STATE_CUM_WEIGHTS: Tuple[int, ...] = (7, 9, 10)
+
+# Work shift for each hour of the day (0-23), so looking up the current shift is a single indexed load.
+# Day shift: 6:00 AM to 1:59 PM, evening shift: 2:00 PM to 9:59 PM, night shift: 10:00 PM to 5:59 AM.
+_SHIFT_BY_HOUR: Tuple[str, ...] = tuple(
+    "day" if 6 <= hour < 14 else "evening" if 14 <= hour < 22 else "night" for hour in range(24)
+)
 
 class SensorSimulator:
     """
     Manages multiple Machine instances and simulates their sensor data generation over time.
     This class orchestrates the behavior of several machines, updating their states
-    and generating sensor readings in a background thread to simulate a continuous
+    and generating sensor readings in a background asyncio task to simulate a continuous
     operational environment.
     """
 
@@ -28,65 +75,56 @@ class SensorSimulator:
         """
         self.machines: Dict[str, Machine] = {}  # Dictionary to store machine instances, keyed by machine_id.
         self.latest_snapshot: Dict[str, dict] = {}  # Stores the most recent sensor data for each machine.
-        self._lock = threading.Lock()  # A lock to ensure thread-safe access to shared data (machines, latest_snapshot).
-        self._running = False  # Flag to control the main simulation loop.
+        self._snapshot_view = MappingProxyType(self.latest_snapshot)  # Read-only live view of latest_snapshot.
+        self._last_tick_iso: Optional[str] = None  # ISO 8601 timestamp of the most recent simulation tick.
+        # Each machine is guarded by its own lock (Machine._lock). latest_snapshot is only ever updated by
+        # single item assignments, which are atomic, so readers can copy it without taking any lock.
+        self._lock = threading.Lock()  # A lock serializing snapshot publication and summary counter updates.
+        # Machine state and error code counts over latest_snapshot, kept up to date as readings are stored
+        # (see _store_reading), so the summaries do not need to scan the snapshot.
+        self._state_counts: Dict[str, int] = {state.value: 0 for state in MachineState}
+        self._error_counts: Dict[str, int] = {}
+        self._error_machine_ids: Set[str] = set()  # IDs of the machines whose latest reading is in an ERROR state.
+        self._snapshot_version: int = 0  # Incremented every time the serialized snapshot is rebuilt.
+        # The latest snapshot serialized as JSON with its version, rebuilt once per update so all consumers
+        # can share it. Stored as one tuple so readers always see a matching version and payload.
+        self._serialized_snapshot: Tuple[int, bytes] = (0, orjson.dumps(self.latest_snapshot))
+        self._stop_event = threading.Event()  # Set to stop the main simulation loop; wakes it up immediately.
+        self._stop_event.set()  # The simulation is not running until start() is called.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # The event loop running the simulation loop.
+        self._task: Optional[asyncio.Task] = None  # The simulation loop task; referenced so it is not garbage collected.
+        self._wakeup: Optional[asyncio.Event] = None  # Set to make the simulation loop recompute its next deadline.
 
         # Simulation settings
         self.update_interval: int = 5  # Interval in seconds between simulation updates for each machine.
         self.simulation_speed: float = 1.0  # Multiplier for simulation time; 1.0 is real-time. >1 is faster, <1 is slower.
 
-        # Energy profile multipliers by product type.
-        # This dictionary defines how energy consumption varies based on the product being manufactured.
-        energy_profile: Dict[str, float] = {
-            ProductType.POLYETHYLENE.value: 1.1,
-            ProductType.POLYPROPYLENE.value: 1.0,
-            ProductType.PVC.value: 1.3,
-            ProductType.POLYSTYRENE.value: 1.05,
-            ProductType.ABS.value: 0.95,
-        }
+        self._rng = np.random.default_rng()  # Random generator for the machine setup and vectorized sensor data generation.
+        # Draw every machine's random setup parameters at once rather than one Python RNG call per machine:
+        # a slightly varied maximum vibration level, and an offset for staggering its 'last_state_change'.
+        max_vibrations: List[float] = self._rng.uniform(0.6, 0.8, size=machine_count).tolist()
+        state_change_offsets: List[int] = self._rng.integers(0, self.update_interval * 5 + 1, size=machine_count).tolist()
+        setup_time: float = time.time()
 
         # Create and configure the specified number of machine instances.
-        product_types: List[ProductType] = list(ProductType) # Get a list of all available product types.
-
         for i in range(machine_count):
             # Assign a product type to the machine, cycling through the available types.
-            product: ProductType = product_types[i % len(product_types)]
+            product: ProductType = _PRODUCT_TYPES[i % len(_PRODUCT_TYPES)]
             machine_id: str = f"Machine_{i+1}" # Create a unique ID for each machine.
 
-            # Define product-specific operational ranges for temperature.
-            temp_ranges: Dict[str, Tuple[float, float]] = {
-                ProductType.POLYETHYLENE.value: (85, 125),
-                ProductType.POLYPROPYLENE.value: (80, 120),
-                ProductType.PVC.value: (90, 135),
-                ProductType.POLYSTYRENE.value: (75, 115),
-                ProductType.ABS.value: (82, 122)
-            }
-
-            # Define product-specific operational ranges for pressure.
-            pressure_ranges: Dict[str, Tuple[float, float]] = {
-                ProductType.POLYETHYLENE.value: (0.4, 0.9),
-                ProductType.POLYPROPYLENE.value: (0.35, 0.85),
-                ProductType.PVC.value: (0.45, 0.95),
-                ProductType.POLYSTYRENE.value: (0.3, 0.8),
-                ProductType.ABS.value: (0.38, 0.88)
-            }
-
-            # Get the specific temperature and pressure ranges for the current product, with defaults.
-            temp_range: Tuple[float, float] = temp_ranges.get(product.value, (80, 130))
-            pressure_range: Tuple[float, float] = pressure_ranges.get(product.value, (0.3, 1.0))
+            # Get the specific temperature and pressure ranges for the current product.
+            temp_range: Tuple[float, float] = _TEMP_RANGES[product]
+            pressure_range: Tuple[float, float] = _PRESSURE_RANGES[product]
             # Assign a slightly varied maximum vibration level for each machine.
-            max_vibration: float = random.uniform(0.6, 0.8)
+            max_vibration: float = max_vibrations[i]
 
             # Instantiate the Machine object.
             machine = Machine(machine_id, product, temp_range, pressure_range,
-                              energy_profile, max_vibration)
+                              _ENERGY_PROFILE, max_vibration)
 
             # Initialize machines with a distribution of states to simulate a more realistic factory floor.
             # Weighted towards ACTIVE and IDLE states.
-            initial_states: List[MachineState] = ([MachineState.ACTIVE] * 7 +
-                                                  [MachineState.IDLE] * 2 +
-                                                  [MachineState.MAINTENANCE] * 1) # 70% Active, 20% Idle, 10% Maintenance
-            machine.current_state = random.choice(initial_states)
+            machine.current_state = random.choices(_INITIAL_STATE_POP, cum_weights=_INITIAL_STATE_CUM_WEIGHTS)[0]
             if machine.current_state == MachineState.ERROR: # Ensure error state has a code if chosen initially
                 machine._assign_error_code()
 
@@ -94,138 +132,337 @@ class SensorSimulator:
             # Stagger the 'last_state_change' timestamp slightly to prevent all machines
             # from trying to change state simultaneously at the very beginning.
             # This introduces a bit of desynchronization.
-            machine.last_state_change = datetime.now(timezone.utc) - timedelta(seconds=random.randint(0, self.update_interval * 5))
+            machine.last_state_change = setup_time - state_change_offsets[i]
 
             self.machines[machine_id] = machine # Add the configured machine to the simulator's collection.
 
+        # Structure-of-arrays view of the machines' fixed parameters, one slot per machine in self.machines order,
+        # so _vectorized_tick can generate every machine's sensor data in one NumPy pass.
+        fleet: List[Machine] = list(self.machines.values())
+        self._fleet = fleet
+        self._slots = np.arange(len(fleet))
+        self._machine_ids: List[str] = [machine.machine_id for machine in fleet]
+        self._slot_index: Dict[str, int] = {machine_id: slot for slot, machine_id in enumerate(self._machine_ids)}
+        self._product_values: List[str] = [machine.product_type.value for machine in fleet]
+        # Resolved sensor ranges (energy multiplier and max vibration applied), indexed by
+        # [slot, MachineStateID, error index + 1, field].
+        self._sensor_low = np.array([machine._sensor_low for machine in fleet]).reshape(-1, *_SENSOR_LOW.shape)
+        self._sensor_span = np.array([machine._sensor_span for machine in fleet]).reshape(-1, *_SENSOR_LOW.shape)
+        self._base_temp = np.array([machine._base_temp for machine in fleet])
+        self._base_pressure = np.array([machine._base_pressure for machine in fleet])
+        # Long-lived batch that every tick refills in place, instead of allocating new arrays per tick.
+        # It is private to the simulation loop; the readings built from it are new dictionaries, so
+        # readings already stored in the snapshot are never modified. The fixed columns are filled once.
+        self._batch = SensorBatch(len(fleet))
+        self._batch.machine_id[:] = self._machine_ids
+        self._batch.product_type[:] = self._product_values
+
     def start(self):
         """
-        Starts the sensor data simulation in a new background thread.
+        Starts the sensor data simulation as a background asyncio task.
+        When called from a running event loop (e.g., FastAPI's), the task runs on that loop, next to the
+        WebSocket broadcaster. Otherwise, it runs on its own event loop in a daemon thread.
         If the simulation is already running, this method does nothing.
         """
-        if not self._running:
-            self._running = True
+        if self._stop_event.is_set():
+            self._stop_event.clear()
             print(f"Starting sensor simulation with {len(self.machines)} machines...")
             print(f"Update interval: {self.update_interval}s, Simulation speed: {self.simulation_speed}x")
-            # Create a daemon thread that will run the _update_loop method.
-            # Daemon threads automatically exit when the main program exits.
-            simulation_thread = threading.Thread(target=self._update_loop, daemon=True)
-            simulation_thread.start()
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+
+            if loop is not None:
+                self._task = loop.create_task(self._update_loop_async())
+            else:
+                # Create a daemon thread that will run the _update_loop_async method on its own event loop.
+                # Daemon threads automatically exit when the main program exits.
+                simulation_thread = threading.Thread(target=asyncio.run, args=(self._update_loop_async(),), daemon=True)
+                simulation_thread.start()
 
     def stop(self):
         """
         Stops the sensor data simulation.
-        Sets the _running flag to False, causing the background thread to terminate its loop.
+        Sets the stop event, waking the simulation loop and causing it to terminate.
+        """
+        self._stop_event.set()
+        self._wake()
+        print("Sensor simulation stopping...")
+        # Note: A waiting loop stops immediately; a loop mid-update completes its current iteration first.
+
+    def _wake(self):
+        """
+        Wakes the simulation loop so it rechecks the stop event and recomputes its next deadline.
+        Safe to call from any thread, as the synchronous API endpoints run in a thread pool.
         """
-        self._running = False
-        print("Sensor simulation stopping... Please wait for the current update cycle to complete.")
-        # Note: The thread will complete its current iteration before stopping.
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
 
-    def _update_loop(self):
+    async def _update_loop_async(self):
         """
-        The main loop for the simulation, running in a separate thread.
+        The main loop for the simulation, running as an asyncio task.
         Periodically updates the state and sensor data for each machine.
+        Ticks are scheduled against monotonic deadlines, so the time spent updating does not cause drift.
         """
-        while self._running:
-            try:
-                current_time_utc = datetime.now(timezone.utc)
-                # Determine the current work shift based on the hour of the day.
-                current_shift = self._get_shift(current_time_utc.hour)
-
-                # Acquire the lock to ensure exclusive access to shared machine data.
-                with self._lock:
-                    for machine_id, machine in self.machines.items():
-                        # Update the state of the machine (e.g., ACTIVE, IDLE, ERROR).
-                        machine.update_state(current_time_utc, current_shift)
-                        # Generate new sensor data based on the machine's current state.
-                        data = machine.generate_sensor_data(current_time_utc)
-                        # Store the latest data for this machine in the snapshot.
-                        self.latest_snapshot[machine_id] = data
-
-                # Pause the loop according to the update interval and simulation speed.
-                # A higher simulation_speed results in a shorter sleep time.
-                time.sleep(self.update_interval / self.simulation_speed)
-
-            except Exception as e:
-                # Log any errors that occur within the simulation loop to prevent it from crashing.
-                print(f"Error in simulation loop: {e}")
-                # Brief pause after an error to avoid rapid error logging.
-                time.sleep(1)
-        print("Simulation loop has ended.")
+        try:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            tick_due = time.monotonic()  # Monotonic time at which the current tick was due.
+            while not self._stop_event.is_set():
+                try:
+                    # Freeze one timestamp per tick, shared by all machines.
+                    current_time_utc = datetime.now(timezone.utc)
+                    # Convert to epoch seconds once per tick for the machines' state bookkeeping.
+                    current_time_epoch = current_time_utc.timestamp()
+                    # Format the ISO 8601 string once per tick for all readings.
+                    current_time_iso = current_time_utc.isoformat()
+                    # Determine the current work shift based on the hour of the day.
+                    current_shift = self._get_shift(current_time_utc.hour)
+
+                    # Update every machine and generate all of their sensor data in one vectorized pass.
+                    self._vectorized_tick(current_time_iso, current_time_epoch, current_shift)
+                    self._last_tick_iso = current_time_iso  # A single attribute assignment, atomic for readers.
+                    self._publish_snapshot()
+
+                except Exception as e:
+                    # Log any errors that occur within the simulation loop to prevent it from crashing.
+                    print(f"Error in simulation loop: {e}")
+                    # Brief pause after an error to avoid rapid error logging.
+                    await asyncio.sleep(1)
+
+                # Wait until the next tick is due, according to the update interval and simulation speed.
+                # A higher simulation_speed results in a shorter period. The deadline is recomputed whenever
+                # the loop is woken up (see set_simulation_speed), so speed changes apply immediately.
+                period = self.update_interval / self.simulation_speed
+                while not self._stop_event.is_set():
+                    remaining = tick_due + period - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    period = self.update_interval / self.simulation_speed
+
+                # Advance the deadline by exactly one period, unless the loop fell more than a period behind;
+                # then resume from now instead of running a burst of catch-up ticks.
+                now = time.monotonic()
+                tick_due = tick_due + period if now - tick_due < 2 * period else now
+        finally:
+            # Mark the simulation as stopped however the loop ends, including when the task is cancelled
+            # because its event loop shuts down, so a later start() runs the simulation again.
+            self._stop_event.set()
+            self._task = None
+            self._loop = None
+            self._wakeup = None
+            print("Simulation loop has ended.")
+
+
+    def _vectorized_tick(self, current_time_iso: str, current_time_epoch: float, current_shift: str):
+        """
+        Advances all machines by one tick. State updates are per machine, but the sensor data for all
+        machines is generated with a few NumPy calls covering every machine at once, and the
+        resulting readings are stored in latest_snapshot.
+
+        :param current_time_iso: The current UTC time as an ISO 8601 string.
+        :param current_time_epoch: The same time as epoch seconds.
+        :param current_shift: The current work shift.
+        """
+        n = len(self._fleet)
+        state_ids: List[int] = []
+        error_indexes: List[int] = []
+        uptimes: List[float] = []
+        for machine in self._fleet:
+            # Acquire only this machine's lock, so readers and other machines are never blocked.
+            with machine._lock:
+                # Update the state of the machine (e.g., ACTIVE, IDLE, ERROR).
+                machine.update_state(current_time_epoch, current_shift)
+                state_ids.append(machine._state_id)
+                error_indexes.append(NO_ERROR if machine._error_idx is None else machine._error_idx)
+                uptimes.append(machine.uptime_hours)
+
+        # Look up every machine's sensor ranges for its state and error code, then draw all values at once.
+        states = np.array(state_ids, dtype=np.intp)
+        errors = np.array(error_indexes, dtype=np.intp)
+        batch = self._batch  # Refilled in place; its machine_id and product_type columns never change.
+        low = self._sensor_low[self._slots, states, errors + 1]
+        span = self._sensor_span[self._slots, states, errors + 1]
+        _generate_sensor_columns(low, span, self._base_temp, self._base_pressure, self._rng,
+                                 batch.temperature, batch.pressure, batch.energy_consumption, batch.vibration,
+                                 batch.production_rate, batch.humidity, batch.raw_material_quality,
+                                 batch.operator_override)
+
+        # Fill the remaining columns; error fields are only reported in the ERROR state.
+        batch.timestamp[:] = [current_time_iso] * n
+        batch.state[:] = states
+        np.round(uptimes, 1, out=batch.uptime_hours)
+        batch.error_code[:] = np.where(states == MachineStateID.ERROR, errors, NO_ERROR)
+
+        for machine, reading, state_id, error_idx in zip(self._fleet, batch.to_records(), state_ids, error_indexes):
+            with machine._lock:
+                # Skip readings made stale by a concurrent force_state_change, which stores its own reading.
+                current_error_idx = NO_ERROR if machine._error_idx is None else machine._error_idx
+                if machine._state_id == state_id and current_error_idx == error_idx:
+                    # Store the latest data for this machine in the snapshot.
+                    self._store_reading(machine.machine_id, reading)
+
+    def _store_reading(self, machine_id: str, reading: dict):
+        """
+        Stores a machine's latest reading in the snapshot (an atomic item assignment), and updates the
+        state and error counters by the difference to the reading it replaces, as well as the set of machines in error.
+        Must be called with the machine's lock held.
+
+        :param machine_id: The ID of the machine the reading belongs to.
+        :param reading: The machine's new sensor data.
+        """
+        with self._lock:
+            previous = self.latest_snapshot.get(machine_id)
+            if previous is not None:
+                self._count_reading(previous, -1)
+            self._count_reading(reading, 1)
+            if reading['state'] == MachineState.ERROR.value:
+                self._error_machine_ids.add(machine_id)
+            else:
+                self._error_machine_ids.discard(machine_id)
+            self.latest_snapshot[machine_id] = reading
+
+    def _count_reading(self, reading: dict, delta: int):
+        """
+        Adds a reading's state and error code to the summary counters, or removes them with delta -1.
+        Must be called with the lock held.
+
+        :param reading: The sensor data to count.
+        :param delta: 1 to add the reading to the counters, -1 to remove it.
+        """
+        state = reading['state']
+        self._state_counts[state] += delta
+        # Only machines in an ERROR state with an error_code count towards the error summary.
+        error_code = reading['error_code']
+        if state == MachineState.ERROR.value and error_code:
+            count = self._error_counts.get(error_code, 0) + delta
+            if count:
+                self._error_counts[error_code] = count
+            else:
+                del self._error_counts[error_code]  # Only report error codes that currently occur.
+
+    def _publish_snapshot(self):
+        """
+        Serializes the latest snapshot once and bumps its version, so consumers can reuse the payload
+        and skip unchanged snapshots.
+        """
+        with self._lock:
+            self._snapshot_version += 1
+            self._serialized_snapshot = (self._snapshot_version, orjson.dumps(self.latest_snapshot))
 
+    def get_serialized_snapshot(self) -> Tuple[int, bytes]:
+        """
+        Retrieves the latest snapshot as pre-serialized JSON, without copying it.
+        This method is thread-safe and does not block.
+
+        :return: A tuple (version, JSON bytes). The version changes whenever the snapshot is updated.
+        """
+        return self._serialized_snapshot
 
     def get_latest_data(self) -> Dict[str, dict]:
         """
         Retrieves a snapshot of the latest sensor data for all machines.
-        This method is thread-safe.
+        This method is thread-safe and does not block.
 
         :return: A dictionary where keys are machine_ids and values are their latest sensor data.
         """
-        with self._lock:
-            # Return a copy of the snapshot to prevent external modification of the internal state.
-            return dict(self.latest_snapshot)
+        # Return a copy of the snapshot to prevent external modification of the internal state.
+        # Copying a dict is atomic, so no lock is needed.
+        return dict(self.latest_snapshot)
+
+    def get_last_tick_timestamp(self) -> Optional[str]:
+        """
+        Retrieves the timestamp of the most recent simulation tick, shared by all readings of that tick.
+        This method is thread-safe and does not block.
+
+        :return: The ISO 8601 timestamp of the last tick, or None if no tick has run yet.
+        """
+        return self._last_tick_iso
+
+    def get_latest_data_view(self) -> Mapping[str, dict]:
+        """
+        Retrieves a read-only, live view of the latest sensor data for all machines, without copying it.
+        Intended for read-only consumers; use get_latest_data for a copy that is safe to modify.
+
+        :return: A read-only mapping where keys are machine_ids and values are their latest sensor data.
+                 The view always reflects the current snapshot.
+        """
+        return self._snapshot_view
 
     def get_machine_states_summary(self) -> Dict[str, int]:
         """
         Provides a summary of the current states of all machines (e.g., how many are ACTIVE, IDLE, etc.).
-        This method is thread-safe.
+        This method is thread-safe; it only briefly holds the counter lock.
 
         :return: A dictionary where keys are state names (str) and values are the counts of machines in that state.
         """
+        # The counts are maintained incrementally as readings are stored, so this is a small copy.
         with self._lock:
-            summary: Dict[str, int] = {state.value: 0 for state in MachineState} # Initialize counts for all possible states
-            for data in self.latest_snapshot.values():
-                current_machine_state = data.get('state')
-                if current_machine_state in summary:
-                    summary[current_machine_state] += 1
-            return summary
+            return self._state_counts.copy()
 
     def get_error_summary(self) -> Dict[str, int]:
         """
         Provides a summary of current errors across all machines, categorized by error code.
-        This method is thread-safe.
+        This method is thread-safe; it only briefly holds the counter lock.
 
         :return: A dictionary where keys are error codes (str) and values are the counts of machines exhibiting that error.
         """
+        # The counts are maintained incrementally as readings are stored, so this is a small copy.
         with self._lock:
-            error_counts: Dict[str, int] = {}
-            for data in self.latest_snapshot.values():
-                # Check if the machine is in an ERROR state and has an error_code.
-                if data.get('state') == MachineState.ERROR.value and data.get('error_code'):
-                    error_code = data['error_code']
-                    error_counts[error_code] = error_counts.get(error_code, 0) + 1
-            return error_counts
+            return self._error_counts.copy()
+
+    def get_error_machine_ids(self) -> Tuple[str, ...]:
+        """
+        Retrieves the IDs of all machines currently in an ERROR state.
+        This method is thread-safe; it only briefly holds the counter lock.
+
+        :return: A tuple of the machine IDs whose latest reading is in an ERROR state, in machine order.
+        """
+        # The set is maintained incrementally as readings are stored, so this only copies the machines in error.
+        with self._lock:
+            error_machine_ids = tuple(self._error_machine_ids)
+        # Sets iterate in hash order, which varies between runs; only the few machines in error are sorted.
+        return tuple(sorted(error_machine_ids, key=self._slot_index.__getitem__))
 
     def force_state_change(self, machine_id: str, new_state: MachineState) -> bool:
         """
         Manually forces a specific machine to a new state. Useful for testing or specific scenarios.
-        This method is thread-safe.
+        This method is thread-safe; it only locks the affected machine.
 
         :param machine_id: The ID of the machine to modify.
         :param new_state: The MachineState to set for the machine.
         :return: True if the state change was successful, False if the machine_id was not found.
         """
-        with self._lock:
-            if machine_id in self.machines:
-                machine = self.machines[machine_id]
-                machine.current_state = new_state
-                machine.last_state_change = datetime.now(timezone.utc) # Update timestamp for the change.
-
-                # If the new state is ERROR, assign an appropriate error code.
-                if new_state == MachineState.ERROR:
-                    machine._assign_error_code() # Internal method of Machine class
-                else:
-                    # Clear any existing error codes if the machine is no longer in an ERROR state.
-                    machine.error_code = None
-                    machine.error_description = None
-
-                print(f"Forced machine '{machine_id}' to state: {new_state.value}")
-                # Update the snapshot immediately to reflect this forced change
-                self.latest_snapshot[machine_id] = machine.generate_sensor_data(datetime.now(timezone.utc))
-                return True
+        machine = self.machines.get(machine_id)
+        if machine is None:
+            print(f"Machine '{machine_id}' not found for state change.")
+            return False
+
+        now = datetime.now(timezone.utc)  # A single timestamp for the change and its reading.
+        with machine._lock:
+            machine.current_state = new_state
+            machine.last_state_change = now.timestamp() # Update timestamp (epoch seconds) for the change.
+
+            # If the new state is ERROR, assign an appropriate error code.
+            if new_state == MachineState.ERROR:
+                machine._assign_error_code() # Internal method of Machine class
             else:
-                print(f"Machine '{machine_id}' not found for state change.")
-                return False
+                # Clear any existing error codes if the machine is no longer in an ERROR state.
+                machine.error_code = None
+
+            # Update the snapshot immediately to reflect this forced change
+            self._store_reading(machine_id, machine.generate_sensor_data(now))
+
+        print(f"Forced machine '{machine_id}' to state: {new_state.value}")
+        self._publish_snapshot()
+        return True
 
     def set_simulation_speed(self, speed: float):
         """
@@ -236,6 +473,8 @@ class SensorSimulator:
         """
         # Clamp the speed to a reasonable range to prevent extreme values.
         self.simulation_speed = max(0.1, min(10.0, speed))
+        # Wake the simulation loop so the next tick is rescheduled with the new speed.
+        self._wake()
         print(f"Simulation speed set to {self.simulation_speed}x")
 
     @staticmethod
@@ -247,12 +486,7 @@ class SensorSimulator:
         :param hour: The current hour (0-23).
         :return: A string representing the shift ("day", "evening", or "night").
         """
-        if 6 <= hour < 14:  # Day shift: 6:00 AM to 1:59 PM
-            return "day"
-        elif 14 <= hour < 22:  # Evening shift: 2:00 PM to 9:59 PM
-            return "evening"
-        else:  # Night shift: 10:00 PM to 5:59 AM
-            return "night"
+        return _SHIFT_BY_HOUR[hour]
 
     def print_status(self):
         """
@@ -261,7 +495,7 @@ class SensorSimulator:
         This is useful for monitoring the simulation.
         """
         # Retrieve current state and error summaries.
-        # These methods are thread-safe due to their internal locking.
+        # These methods are thread-safe; they copy the incrementally maintained counters under the counter lock.
         states_summary = self.get_machine_states_summary()
         errors_summary = self.get_error_summary()
 
@@ -5,14 +5,16 @@
 # traditional RESTful HTTP endpoints and a real-time WebSocket data stream.
 # It also initializes and manages the sensor data simulator.
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, Response
 from data_producer.sensor_simulator import SensorSimulator
 from data_producer.models import MachineState
 from dotenv import load_dotenv
 import os
 import asyncio
-from typing import List, Dict, Any
-import json
+import hmac
+import itertools
+from typing import Dict, Any, Tuple
 
 # Load environment variables from a .env file.
 # This is crucial for securely managing configurations like API keys.
@@ -20,24 +22,74 @@ load_dotenv()
 
 # Initialize the FastAPI application.
 # Provide metadata for automatic API documentation (e.g., Swagger UI).
+# Responses are serialized with orjson, which is considerably faster than the standard json module.
 app = FastAPI(
     title="Industrial Sensor API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Initialize and start the sensor data simulator.
+# Initialize the sensor data simulator; it is started on the application's event loop at startup.
 # This component continuously generates simulated sensor readings for multiple machines.
 simulator = SensorSimulator()
-simulator.start()
 
 # Retrieve the API key from environment variables for request authentication.
 API_KEY = os.getenv("API_KEY")
+# The API key encoded once, for constant-time comparisons. None if no API key is configured.
+API_KEY_BYTES = API_KEY.encode() if API_KEY is not None else None
 
 # --- WebSocket Specific Additions ---
 
-# Maintain a list of all active WebSocket connections.
-# This allows the server to broadcast messages to all connected clients.
-active_websocket_connections: List[WebSocket] = []
+# Maximum number of messages queued for a single WebSocket client.
+# When a slow client falls behind, its oldest pending message is dropped in favour of the newest one.
+WEBSOCKET_QUEUE_SIZE = 4
+
+# Maintain a registry of all active WebSocket connections and their outgoing message queues,
+# keyed by a unique connection token.
+# This allows the server to broadcast messages to all connected clients,
+# and to add or remove a connection in constant time.
+active_websocket_connections: Dict[int, Tuple[WebSocket, asyncio.Queue]] = {}
+_connection_tokens = itertools.count()  # Source of unique connection tokens.
+
+async def _send_queued_messages(token: int, websocket: WebSocket, queue: asyncio.Queue):
+    """
+    Per-connection background task that sends the messages queued for one WebSocket client.
+
+    Each client has its own sender, so a slow client only delays its own messages
+    and never the broadcast to the other clients.
+
+    Args:
+        token (int): The connection's key in active_websocket_connections.
+        websocket (WebSocket): The WebSocket connection to send to.
+        queue (asyncio.Queue): The connection's queue of outgoing text messages.
+    """
+    try:
+        while True:
+            message = await queue.get()
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        # Handle client disconnection gracefully.
+        print(f"WebSocket client disconnected. Total active connections: {len(active_websocket_connections)}")
+    except Exception as e:
+        # Log any other errors during data transmission to this client.
+        print(f"Error sending data to WebSocket client: {e}")
+    finally:
+        # Remove the connection so the broadcaster stops queueing messages for it.
+        # It may already have been removed by its endpoint handler.
+        active_websocket_connections.pop(token, None)
+
+def _enqueue_message(queue: asyncio.Queue, message: str):
+    """
+    Queues a message for one WebSocket client without waiting, dropping the oldest queued message if the queue is full.
+
+    Args:
+        queue (asyncio.Queue): The connection's queue of outgoing text messages.
+        message (str): The message to queue.
+    """
+    if queue.full():
+        # The client is falling behind; only the most recent snapshots are worth sending.
+        queue.get_nowait()
+    queue.put_nowait(message)
 
 async def send_latest_data_to_websocket_clients():
     """
@@ -45,30 +97,26 @@ async def send_latest_data_to_websocket_clients():
     to all currently connected WebSocket clients.
 
     This ensures real-time data streaming without requiring clients to poll.
+    Snapshots are only broadcast when they have changed since the last broadcast.
     """
+    last_version = 0
     while True:
-        # Fetch the most recent sensor data from the simulator.
-        latest_data = simulator.get_latest_data()
-        
-        # Serialize the Python dictionary data into a JSON string for WebSocket transmission.
-        message = json.dumps(latest_data)
-
-        # Iterate through a copy of the active connections and attempt to send the data.
-        # A copy is used to prevent issues if connections are removed during iteration.
-        for connection in active_websocket_connections.copy():
-            try:
-                # Send the JSON message over the WebSocket connection.
-                await connection.send_text(message)
-            except WebSocketDisconnect:
-                # Handle client disconnection gracefully.
-                # Remove the disconnected client from the active connections list.
-                print(f"WebSocket client disconnected. Total active connections: {len(active_websocket_connections)}")
-                active_websocket_connections.remove(connection)
-            except Exception as e:
-                # Catch and log any other errors during data transmission to a specific client.
-                # Remove the problematic connection to prevent further errors.
-                print(f"Error sending data to WebSocket client: {e}")
-                active_websocket_connections.remove(connection)
+        # Fetch the most recent snapshot, already serialized to JSON by the simulator.
+        version, payload = simulator.get_serialized_snapshot()
+
+        # Skip the broadcast entirely if the snapshot has not changed since the last one.
+        if version == last_version:
+            await asyncio.sleep(1)
+            continue
+        last_version = version
+
+        # Decode the shared JSON payload once per snapshot; it is sent as a text frame to every client.
+        message = payload.decode()
+
+        # Queue the data for every active connection; each connection's sender task does the actual sending.
+        # Queueing never waits, so a slow client cannot hold up the broadcast to the others.
+        for _, queue in active_websocket_connections.values():
+            _enqueue_message(queue, message)
 
         # Pause the task for a specified duration before sending the next batch of data.
         # Adjust this delay to control the frequency of data pushes to clients.
@@ -80,11 +128,22 @@ async def startup_event():
     FastAPI lifecycle event handler.
     Executes a task when the application starts up.
     """
+    # Start the simulation as a background task on this event loop, next to the WebSocket broadcaster.
+    simulator.start()
     # Create and run the data broadcasting function as a non-blocking background task.
     # This allows the API to serve HTTP requests concurrently with WebSocket streaming.
-    asyncio.create_task(send_latest_data_to_websocket_clients())
+    app.state.websocket_sender = asyncio.create_task(send_latest_data_to_websocket_clients())
     print("Background WebSocket data sender initiated.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    FastAPI lifecycle event handler.
+    Stops the background tasks when the application shuts down, so a later startup can start them again.
+    """
+    simulator.stop()
+    app.state.websocket_sender.cancel()
+
 @app.websocket("/ws/sensordata")
 async def websocket_endpoint(websocket: WebSocket, api_key: str):
     """
@@ -97,14 +156,23 @@ async def websocket_endpoint(websocket: WebSocket, api_key: str):
         websocket (WebSocket): The WebSocket connection object managed by FastAPI.
         api_key (str): The API key provided by the client for authentication.
     """
+    token = next(_connection_tokens)  # This connection's key in active_websocket_connections.
+    sender = None  # The task sending this connection's queued messages, once accepted.
     try:
         # Authenticate the incoming WebSocket connection using the provided API key.
         verify_api_key(api_key) 
         
         # Accept the WebSocket connection after successful authentication.
         await websocket.accept()
-        # Add the newly accepted connection to the list of active clients.
-        active_websocket_connections.append(websocket)
+        # Give the connection its own bounded message queue, drained by its own sender task.
+        queue = asyncio.Queue(maxsize=WEBSOCKET_QUEUE_SIZE)
+        # Queue the current snapshot right away, as the broadcaster only sends changed snapshots.
+        version, payload = simulator.get_serialized_snapshot()
+        if version:
+            queue.put_nowait(payload.decode())
+        # Add the newly accepted connection to the active clients.
+        active_websocket_connections[token] = (websocket, queue)
+        sender = asyncio.create_task(_send_queued_messages(token, websocket, queue))
         print(f"New WebSocket client connected. Total active connections: {len(active_websocket_connections)}")
 
         # Keep the connection alive indefinitely.
@@ -126,10 +194,12 @@ async def websocket_endpoint(websocket: WebSocket, api_key: str):
         # Log any other unexpected errors that occur during the WebSocket connection.
         print(f"WebSocket connection error: {e}")
     finally:
-        # Ensure the WebSocket connection is removed from the active list
+        # Ensure the WebSocket connection is removed from the active connections
         # when it closes, either gracefully or due to an error.
-        if websocket in active_websocket_connections:
-            active_websocket_connections.remove(websocket)
+        active_websocket_connections.pop(token, None)
+        # Stop the connection's sender task, discarding any messages still queued for it.
+        if sender is not None:
+            sender.cancel()
         print(f"WebSocket connection closed. Total active connections: {len(active_websocket_connections)}")
 
 # --- Core Authentication Function ---
@@ -137,11 +207,13 @@ async def websocket_endpoint(websocket: WebSocket, api_key: str):
 def verify_api_key(api_key: str):
     """
     Authenticates incoming requests by validating the provided API key.
+    Used as a dependency of the REST endpoints, which read `api_key` from the query string.
+    The comparison runs in constant time, so response timing does not reveal the key.
 
     Raises:
-        HTTPException: If the API key is invalid, returning a 401 Unauthorized status.
+        HTTPException: If the API key is invalid, or no API key is configured, returning a 401 Unauthorized status.
     """
-    if api_key != API_KEY:
+    if API_KEY_BYTES is None or not hmac.compare_digest(api_key.encode(), API_KEY_BYTES):
         raise HTTPException(status_code=401, detail="Invalid API Key")
 
 # --- Standard REST API Endpoints ---
@@ -156,56 +228,48 @@ def root():
     """
     return {"message": "Welcome to the Industrial Sensor API"}
 
-@app.get("/sensordata")
-def get_sensor_data(api_key: str):
+@app.get("/sensordata", dependencies=[Depends(verify_api_key)])
+def get_sensor_data():
     """
     Retrieves the most recent sensor data for all simulated machines.
 
-    Args:
-        api_key (str): The API key for authenticating the request.
-
     Returns:
         dict: A dictionary where keys are machine IDs and values are their latest sensor readings.
     """
-    verify_api_key(api_key)
-    data = simulator.get_latest_data()
-    return data
+    # Return the snapshot the simulator has already serialized, instead of serializing it again.
+    _, payload = simulator.get_serialized_snapshot()
+    return Response(content=payload, media_type="application/json")
 
-@app.get("/status")
-def get_factory_status(api_key: str):
+@app.get("/status", dependencies=[Depends(verify_api_key)])
+def get_factory_status():
     """
     Provides a high-level summary of the factory's operational status.
 
     Includes aggregated machine states, active error counts, and overall efficiency.
 
-    Args:
-        api_key (str): The API key for authenticating the request.
-
     Returns:
         dict: A summary object containing various factory status metrics.
     """
-    verify_api_key(api_key)
     states_summary = simulator.get_machine_states_summary()
     error_summary = simulator.get_error_summary()
-    latest_data = simulator.get_latest_data()
-    # Safely get a sample timestamp if any machine data exists.
-    sample_timestamp = latest_data.get(list(latest_data.keys())[0], {}).get("timestamp") if latest_data else None
+    # The timestamp of the latest simulation tick, or None if no machine data exists yet.
+    sample_timestamp = simulator.get_last_tick_timestamp()
+    total_machines = len(simulator.machines)
     return {
         "timestamp": sample_timestamp,
-        "total_machines": len(simulator.machines),
+        "total_machines": total_machines,
         "machine_states": states_summary,
         "active_errors": error_summary,
-        "overall_efficiency": round((states_summary.get('active', 0) / len(simulator.machines)) * 100, 1) if simulator.machines else 0.0
+        "overall_efficiency": round((states_summary.get('active', 0) / total_machines) * 100, 1) if total_machines else 0.0
     }
 
-@app.get("/machine/{machine_id}")
-def get_machine_data(machine_id: str, api_key: str):
+@app.get("/machine/{machine_id}", dependencies=[Depends(verify_api_key)])
+def get_machine_data(machine_id: str):
     """
     Retrieves the most recent sensor data for a specific machine.
 
     Args:
         machine_id (str): The unique identifier of the machine.
-        api_key (str): The API key for authenticating the request.
 
     Returns:
         dict: The latest sensor data for the specified machine.
@@ -213,14 +277,14 @@ def get_machine_data(machine_id: str, api_key: str):
     Raises:
         HTTPException: 404 Not Found if the `machine_id` does not exist.
     """
-    verify_api_key(api_key)
-    data = simulator.get_latest_data()
-    if machine_id not in data:
+    data = simulator.get_latest_data_view()  # Read-only access, so no copy is needed.
+    machine_data = data.get(machine_id)
+    if machine_data is None:
         raise HTTPException(status_code=404, detail=f"Machine {machine_id} not found")
-    return data[machine_id]
+    return machine_data
 
-@app.post("/machine/{machine_id}/force-state")
-def force_machine_state(machine_id: str, state: str, api_key: str):
+@app.post("/machine/{machine_id}/force-state", dependencies=[Depends(verify_api_key)])
+def force_machine_state(machine_id: str, state: str):
     """
     Allows forcing a specific state change for a given machine.
     Primarily used for testing, debugging, or simulation control.
@@ -228,7 +292,6 @@ def force_machine_state(machine_id: str, state: str, api_key: str):
     Args:
         machine_id (str): The unique identifier of the machine.
         state (str): The desired new state (e.g., "active", "idle", "error", "maintenance").
-        api_key (str): The API key for authenticating the request.
 
     Returns:
         dict: A confirmation message indicating the state change.
@@ -237,7 +300,6 @@ def force_machine_state(machine_id: str, state: str, api_key: str):
         HTTPException: 400 Bad Request if the `state` is invalid,
                        or 404 Not Found if the `machine_id` does not exist.
     """
-    verify_api_key(api_key)
     try:
         # Convert the string state to the MachineState enum.
         new_state = MachineState(state.lower())
@@ -249,40 +311,40 @@ def force_machine_state(machine_id: str, state: str, api_key: str):
         raise HTTPException(status_code=404, detail=f"Machine {machine_id} not found")
     return {"message": f"Machine {machine_id} state changed to {state}"}
 
-@app.get("/errors")
-def get_error_details(api_key: str):
+@app.get("/errors", dependencies=[Depends(verify_api_key)])
+def get_error_details():
     """
     Fetches a detailed list of all currently active machine errors across the factory.
 
-    Args:
-        api_key (str): The API key for authenticating the request.
-
     Returns:
         dict: An object containing the total count of errors and a list of detailed error records.
     """
-    verify_api_key(api_key)
-    data = simulator.get_latest_data()
-    errors = []
-    for machine_id, machine_data in data.items():
-        if machine_data.get('state') == 'error':
-            errors.append({
-                "machine_id": machine_id,
-                "error_code": machine_data.get('error_code'),
-                "error_description": machine_data.get('error_description'),
-                "product_type": machine_data.get('product_type'),
-                "timestamp": machine_data.get('timestamp'),
-                "temperature": machine_data.get('temperature'),
-                "pressure": machine_data.get('pressure'),
-                "energy_consumption": machine_data.get('energy_consumption'),
-                "vibration": machine_data.get('vibration')
-            })
+    data = simulator.get_latest_data_view()  # Read-only access, so no copy is needed.
+    # Only look at the machines known to be in error, rather than scanning every machine's reading.
+    # A machine may leave the ERROR state in between, so its latest reading's state is checked again.
+    errors = [
+        {
+            "machine_id": machine_id,
+            "error_code": machine_data['error_code'],
+            "error_description": machine_data['error_description'],
+            "product_type": machine_data['product_type'],
+            "timestamp": machine_data['timestamp'],
+            "temperature": machine_data['temperature'],
+            "pressure": machine_data['pressure'],
+            "energy_consumption": machine_data['energy_consumption'],
+            "vibration": machine_data['vibration']
+        }
+        for machine_id in simulator.get_error_machine_ids()
+        for machine_data in (data.get(machine_id),)
+        if machine_data is not None and machine_data['state'] == 'error'
+    ]
     return {
         "total_errors": len(errors),
         "errors": errors
     }
 
-@app.post("/simulation/speed")
-def set_simulation_speed(speed: float, api_key: str):
+@app.post("/simulation/speed", dependencies=[Depends(verify_api_key)])
+def set_simulation_speed(speed: float):
     """
     Sets the speed multiplier for the sensor data simulation.
     This allows controlling how fast data is generated (e.g., 2.0 for twice as fast).
@@ -290,7 +352,6 @@ def set_simulation_speed(speed: float, api_key: str):
     Args:
         speed (float): The desired simulation speed multiplier (e.g., 1.0 for real-time, 5.0 for 5x speed).
                        Valid range is typically between 0.1 and 10.0.
-        api_key (str): The API key for authenticating the request.
 
     Returns:
         dict: A confirmation message indicating the new simulation speed.
@@ -298,7 +359,6 @@ def set_simulation_speed(speed: float, api_key: str):
     Raises:
         HTTPException: 400 Bad Request if the `speed` value is outside the acceptable range.
     """
-    verify_api_key(api_key)
     if not 0.1 <= speed <= 10.0: # Using 'not X <= speed <= Y' is more readable.
         raise HTTPException(status_code=400, detail="Speed must be between 0.1 and 10.0")
     simulator.set_simulation_speed(speed)